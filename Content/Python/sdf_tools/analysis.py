@@ -0,0 +1,178 @@
+# sdf_tools/analysis.py
+import os
+import json
+from . import schema
+from . import utils
+from . import fileio
+from . import merge
+
+IMPORTABLE_FORMATS = utils.CONVERTED_MESH_FORMATS + (".fbx",)
+
+class ModelSummary:
+    """Analyze-mode summary, filled link by link while the SDF is streamed (see parser.parse_sdf)."""
+
+    def __init__(self, sdf_path, files: fileio.MappedFiles, is_cached=None):
+        self.sdf_path = sdf_path
+        self.files = files
+        self.is_cached = is_cached   # callable(uri) -> True if the mesh is already converted or imported
+        self.model_name = None
+        self.masses = {}
+        self.joint_types = {}
+        self.meshes = {}             # resolved uri -> mesh entry
+        self.primitives = 0
+        self.merge_jobs = None       # merge.visual_merge_job results, once add_merge_plan ran
+        self.merged_only = set()     # uris only read by merge jobs (no conversion or import of their own)
+        self.bodies = None           # links left after collapsing fixed joints
+
+    # --- PARSE LISTENER ---
+    def add_link(self, link: schema.Link):
+        self.masses[link.name] = link.inertial.mass
+        for visual in link.visuals:
+            geom = visual.geometry if visual else None
+            if not geom: continue
+            if geom.mesh: self._add_mesh(geom.mesh)
+            else: self.primitives += 1
+
+    def add_joint(self, joint: schema.Joint):
+        self.joint_types[joint.joint_type] = self.joint_types.get(joint.joint_type, 0) + 1
+
+    def add_model(self, model: schema.Model):
+        # replays an already parsed (cached) model
+        for link in model.links.values(): self.add_link(link)
+        for joint in model.joints.values(): self.add_joint(joint)
+        self.model_name = model.name
+
+    def _add_mesh(self, mesh: schema.Mesh):
+        uri = utils.resolve_mesh_uri(self.sdf_path, mesh.uri)
+        entry = self.meshes.get(uri)
+        if entry is not None:
+            entry["uses"] += 1
+            return
+
+        fmt = os.path.splitext(uri)[1].lower()
+        exists = os.path.exists(uri)
+        entry = {"name": mesh.mesh_name, "uri": uri, "format": fmt.lstrip("."), "exists": exists,
+                 "size_bytes": 0, "triangles": None, "uses": 1,
+                 "needs_conversion": fmt in utils.CONVERTED_MESH_FORMATS,
+                 # formats the import path can't handle end up as cubes
+                 "placeholder": exists and fmt not in IMPORTABLE_FORMATS, "cached": False}
+        if entry["exists"]:
+            buf = self.files.view(uri)
+            entry["size_bytes"] = len(buf)
+            if fmt == ".stl":
+                # only the header is read, the triangle records stay untouched
+                tris = fileio.stl_triangles(buf)
+                entry["triangles"] = len(tris) if tris is not None else None
+                self.files.touch(min(len(buf), 84))
+            elif fmt == ".dae":
+                entry["triangles"] = fileio.dae_triangle_estimate(buf)
+                self.files.touch(len(buf))
+            del buf
+        self.meshes[uri] = entry
+
+    def add_merge_plan(self, model: schema.Model):
+        """Projects the static merge pass the import runs by default (see SDFImporter.optimize)."""
+        collapsed = merge.collapse_fixed_joints(model)
+        self.bodies = len(collapsed.links)
+        self.merge_jobs = []
+        merged, direct = set(), set()
+        for link in collapsed.links.values():
+            job = merge.visual_merge_job(collapsed, link)
+            if job:
+                self.merge_jobs.append(job)
+                merged.update(part["path"] for part in job["parts"] if part["type"] == "mesh")
+            else:
+                direct.update(utils.mesh_uris(collapsed, [link]))
+        self.merged_only = merged - direct
+
+    # --- OUTPUT ---
+    def to_dict(self):
+        meshes = sorted(self.meshes.values(), key=lambda m: m["name"])
+        for m in meshes:
+            # merge jobs read these sources themselves
+            m["merged"] = m["uri"] in self.merged_only
+            # checked once the model (and so its manifest) is known, not while streaming
+            if self.is_cached and m["exists"] and not m["placeholder"] and not m["merged"]:
+                m["cached"] = bool(self.is_cached(m["uri"]))
+        own = [m for m in meshes if m["exists"] and not m["placeholder"] and not m["merged"] and not m["cached"]]
+        pending = [m for m in own if m["needs_conversion"]]
+        merge_jobs = self.merge_jobs or []
+        return {
+            "model": self.model_name,
+            "sdf_path": self.sdf_path,
+            "links": len(self.masses),
+            "joints": sum(self.joint_types.values()),
+            "joint_types": dict(self.joint_types),
+            "mass": {"total": sum(self.masses.values()), "links": dict(self.masses)},
+            "meshes": meshes,
+            "primitives": self.primitives,
+            "totals": {
+                "unique_meshes": len(meshes),
+                "missing_meshes": sum(1 for m in meshes if not m["exists"]),
+                "placeholder_meshes": sum(1 for m in meshes if m["placeholder"]),
+                "mesh_bytes": sum(m["size_bytes"] for m in meshes),
+                "estimated_triangles": sum(m["triangles"] or 0 for m in meshes),
+            },
+            "projected_work": {
+                "conversions": len(pending),
+                "conversion_bytes": sum(m["size_bytes"] for m in pending),
+                "cache_hits": sum(1 for m in meshes if m["cached"]),
+                "merges": len(merge_jobs),
+                "merge_parts": sum(len(job["parts"]) for job in merge_jobs),
+                "bodies": self.bodies if self.bodies is not None else len(self.masses),
+                # merged meshes are imported once per merge job
+                "imports": len(own) + len(merge_jobs),
+            },
+        }
+
+def summarize(model: schema.Model, files: fileio.MappedFiles=None, is_cached=None, merge_fixed=True):
+    if files is None:
+        with fileio.MappedFiles() as own_files:
+            return summarize(model, own_files, is_cached, merge_fixed)
+    summary = ModelSummary(model.sdf_path, files, is_cached)
+    summary.add_model(model)
+    if merge_fixed: summary.add_merge_plan(model)
+    return summary
+
+def to_json(summary: dict):
+    return json.dumps(summary, indent=2)
+
+def _size_text(n):
+    for unit in ("B", "KB", "MB"):
+        if n < 1024: return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024.0
+    return f"{n:.1f} GB"
+
+def render_text(summary: dict):
+    lines = [
+        f"Model: {summary['model']} readed from SDF",
+        f"Number of Links: {summary['links']}",
+        f"Number of Joints: {summary['joints']}",
+        "",
+        "Mass information:",
+    ]
+    lines += [f"  - {name}: {mass:.3f} kg" for name, mass in summary["mass"]["links"].items()]
+    lines.append(f"Total mass: {summary['mass']['total']:.3f} kg")
+
+    lines += ["", "Mandatory mesh files for creating process:"]
+    for m in summary["meshes"]:
+        if not m["exists"]:
+            lines.append(f"  - {m['name']} (missing: {m['uri']})")
+            continue
+        tris = f", ~{m['triangles']} tris" if m["triangles"] is not None else ""
+        cached = ", cached" if m["cached"] else ", merged" if m["merged"] else ""
+        placeholder = ", unsupported format: placeholder cube" if m["placeholder"] else ""
+        lines.append(f"  - {m['name']} ({m['format']}, {_size_text(m['size_bytes'])}{tris}{cached}{placeholder})")
+
+    totals, work = summary["totals"], summary["projected_work"]
+    lines += [
+        "",
+        "Expected import cost:",
+        f"  - Meshes: {totals['unique_meshes']} ({_size_text(totals['mesh_bytes'])}, ~{totals['estimated_triangles']} tris)",
+        f"  - Primitive shapes: {summary['primitives']}",
+        f"  - Blender conversions: {work['conversions']} ({_size_text(work['conversion_bytes'])}), cache hits: {work['cache_hits']}",
+        f"  - Blender merges: {work['merges']} ({work['merge_parts']} parts, {work['bodies']} rigid bodies)",
+        f"  - Asset imports: {work['imports']}",
+        f"  - Placeholder cubes: {totals['placeholder_meshes'] + totals['missing_meshes']}",
+    ]
+    return "\n".join(lines) + "\n"
@@ -1,43 +1,19 @@
 import bpy
 import sys
 import os
+import json
+import numpy as np
+
+# blender runs this file as a plain script, so the sibling helpers are imported by path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import mesh_optimize
 
 # to ensure immediate output to the terminal
 def log(msg):
     print(msg)
     sys.stdout.flush()
 
-def convert():
-    # get command line arguments after "--"
-    argv = sys.argv
-    try:
-        if "--" in argv:
-            args = argv[argv.index("--") + 1:]
-        else:
-            args = []
-        
-        if len(args) < 2:
-            log("ERROR: Missing arguments. Usage: blender --background --python blender_convert.py -- <input.dae> <output.fbx>")
-            sys.exit(1)
-            
-        dae_path = args[0]
-        fbx_path = args[1]
-
-    except Exception as e:
-        log(f"ERROR: Argument error: {e}")
-        sys.exit(1)
-
-    # clean the scene
-    log("Cleaning scene...")
-    bpy.ops.wm.read_factory_settings(use_empty=True) # Tamamen boş sahne aç
-
-    # import DAE file
-    if not os.path.exists(dae_path):
-        log(f"ERROR: File not found -> {dae_path}")
-        sys.exit(1)
-
-    log(f"Importing DAE: {dae_path}")
-    
+def import_dae(dae_path):
     try:
         # Collada import işlemi
         bpy.ops.wm.collada_import(
@@ -50,23 +26,147 @@ def convert():
         log(f"ERROR: Python DAE import failed: {e}")
         sys.exit(1)
 
-    # check if any objects were imported
-    if not bpy.context.selected_objects and not bpy.data.objects:
-        log("ERROR: No objects imported from DAE file.")
+def import_mesh(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".dae": import_dae(path)
+    elif ext == ".fbx": bpy.ops.import_scene.fbx(filepath=path)
+    elif ext == ".stl": bpy.ops.wm.stl_import(filepath=path)
+    elif ext == ".obj": bpy.ops.wm.obj_import(filepath=path)
+    else:
+        log(f"ERROR: Unsupported mesh format -> {path}")
         sys.exit(1)
 
-    #    --- YENI EKLENECEK KISIM BASLANGICI ---
-    # Materyal isimlerini Mesh ismine göre unique yap
-    # Bu sayede Unreal'da "Material", "Material.001" çakışması olmaz.
-    input_filename = os.path.splitext(os.path.basename(dae_path))[0]
-    
+def prefix_materials(prefix):
     for mat in bpy.data.materials:
         original_name = mat.name
         # Materyal ismini "DosyaAdi_MateryalAdi" yap
-        mat.name = f"{input_filename}_{original_name}"
+        mat.name = f"{prefix}_{original_name}"
         log(f"Renamed Material: {original_name} -> {mat.name}")
 
-    # export to FBX
+def parse_options(args):
+    # "--weld 1e-05 --max-tris 50000 --quantize 16 --stats out.json" -> dict
+    options = {}
+    for key, value in zip(args[::2], args[1::2]):
+        options[key.lstrip("-").replace("-", "_")] = value
+    return options
+
+def corner_normals(mesh):
+    # shaded normal of every face corner, split vertices (hard edges) and custom normals included
+    normals = np.empty(len(mesh.loops) * 3, dtype=np.float32)
+    if hasattr(mesh, "corner_normals"):  # Blender 4.1+
+        mesh.corner_normals.foreach_get("vector", normals)
+    else:
+        mesh.calc_normals_split()
+        mesh.loops.foreach_get("normal", normals)
+    return normals.reshape(-1, 3)
+
+def optimize_mesh(mesh, weld_tolerance, quantize_bits=None):
+    """Welds, cleans and reorders a mesh in place, keeping UVs, material indices and shading."""
+    mesh.calc_loop_triangles()
+    n_tris = len(mesh.loop_triangles)
+    if n_tris == 0:
+        return None
+
+    tri_verts = np.empty(n_tris * 3, dtype=np.int32)
+    tri_loops = np.empty(n_tris * 3, dtype=np.int32)
+    tri_mats = np.empty(n_tris, dtype=np.int32)
+    tri_polys = np.empty(n_tris, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("vertices", tri_verts)
+    mesh.loop_triangles.foreach_get("loops", tri_loops)
+    mesh.loop_triangles.foreach_get("material_index", tri_mats)
+    mesh.loop_triangles.foreach_get("polygon_index", tri_polys)
+
+    smooth = np.empty(len(mesh.polygons), dtype=bool)
+    mesh.polygons.foreach_get("use_smooth", smooth)
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+
+    # per corner UVs of every triangle, carried along with the kept triangles
+    uvs = {}
+    for layer in mesh.uv_layers:
+        uv = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+        layer.data.foreach_get("uv", uv)
+        uvs[layer.name] = uv.reshape(-1, 2)[tri_loops.reshape(-1, 3)]
+    # welding joins the split vertices CAD exports use for hard edges, so the shading is carried over as custom normals
+    normals = corner_normals(mesh)[tri_loops.reshape(-1, 3)]
+
+    result = mesh_optimize.optimize(co, tri_verts, weld_tolerance, quantize_bits)
+    src = result["source_triangles"]
+    tris = result["triangles"]
+    n = len(tris)
+
+    mesh.clear_geometry()
+    mesh.vertices.add(len(result["positions"]))
+    mesh.vertices.foreach_set("co", result["positions"].astype(np.float32).ravel())
+    mesh.loops.add(n * 3)
+    mesh.loops.foreach_set("vertex_index", tris.astype(np.int32).ravel())
+    mesh.polygons.add(n)
+    mesh.polygons.foreach_set("loop_start", np.arange(0, n * 3, 3, dtype=np.int32))
+    try: mesh.polygons.foreach_set("loop_total", np.full(n, 3, dtype=np.int32))
+    except (AttributeError, TypeError): pass  # derived from loop_start in newer Blender versions
+    mesh.polygons.foreach_set("material_index", tri_mats[src])
+    mesh.polygons.foreach_set("use_smooth", smooth[tri_polys[src]])
+    for name, uv in uvs.items():
+        layer = mesh.uv_layers.get(name) or mesh.uv_layers.new(name=name)
+        layer.data.foreach_set("uv", uv[src].astype(np.float32).ravel())
+
+    mesh.update()
+    mesh.validate()
+    # after validate, which may drop custom data layers
+    if len(mesh.loops) == n * 3:
+        if hasattr(mesh, "use_auto_smooth"): mesh.use_auto_smooth = True  # needed for custom normals before 4.1
+        mesh.normals_split_custom_set(normals[src].reshape(-1, 3).tolist())
+        mesh.update()
+    return result
+
+def decimate_objects(objects, triangle_budget):
+    total = sum(len(o.data.loop_triangles) for o in objects)
+    if total <= triangle_budget:
+        return
+    ratio = triangle_budget / total
+    log(f"Decimating {total} -> ~{triangle_budget} triangles (ratio {ratio:.3f})")
+    for obj in objects:
+        if obj.data.users > 1: obj.data = obj.data.copy()
+        mod = obj.modifiers.new("Decimate", 'DECIMATE')
+        mod.ratio = ratio
+        bpy.context.view_layer.objects.active = obj
+        bpy.ops.object.modifier_apply(modifier=mod.name)
+
+def optimize_scene(options):
+    """Runs the mesh optimization stage on every mesh in the scene and reports before/after counts."""
+    if "weld" not in options:
+        return
+    weld_tolerance = float(options["weld"])
+    quantize_bits = int(options["quantize"]) if "quantize" in options else None
+    objects = [o for o in bpy.data.objects if o.type == 'MESH']
+
+    def run_pass():
+        results = []
+        for mesh in {o.data for o in objects}:
+            # tolerance is in metres, mesh data lives in object space
+            users = [o for o in objects if o.data == mesh]
+            scale = max(max(abs(v) for v in o.matrix_world.to_scale()) for o in users) or 1.0
+            result = optimize_mesh(mesh, weld_tolerance / scale, quantize_bits)
+            if result: results.append((result, len(users)))
+        return results
+
+    first = run_pass()
+    last = first
+    if "max_tris" in options:
+        for o in objects: o.data.calc_loop_triangles()
+        decimate_objects(objects, int(options["max_tris"]))
+        last = run_pass()
+
+    def total(results, which):
+        return {k: sum(r[which][k] * users for r, users in results) for k in ("vertices", "triangles", "bytes")}
+
+    stats = {"before": total(first, "before"), "after": total(last, "after")}
+    log(f"Mesh optimization: {stats['before']} -> {stats['after']}")
+    if "stats" in options:
+        with open(options["stats"], "w") as f:
+            json.dump(stats, f)
+
+def export_fbx(fbx_path):
     log(f"Exporting FBX: {fbx_path}")
     
     try:
@@ -95,6 +195,58 @@ def convert():
         log(f"ERROR: FBX export failed: {e}")
         sys.exit(1)
 
+def convert():
+    # get command line arguments after "--"
+    argv = sys.argv
+    try:
+        if "--" in argv:
+            args = argv[argv.index("--") + 1:]
+        else:
+            args = []
+        
+        if len(args) < 2:
+            log("ERROR: Missing arguments. Usage: blender --background --python blender_convert.py -- <input.dae|stl|obj> <output.fbx>")
+            sys.exit(1)
+            
+        mesh_path = args[0]
+        fbx_path = args[1]
+
+    except Exception as e:
+        log(f"ERROR: Argument error: {e}")
+        sys.exit(1)
+
+    # clean the scene
+    log("Cleaning scene...")
+    bpy.ops.wm.read_factory_settings(use_empty=True) # Tamamen boş sahne aç
+
+    # import DAE file
+    if not os.path.exists(mesh_path):
+        log(f"ERROR: File not found -> {mesh_path}")
+        sys.exit(1)
+
+    log(f"Importing mesh: {mesh_path}")
+    
+    import_mesh(mesh_path)
+
+    # check if any objects were imported
+    if not bpy.context.selected_objects and not bpy.data.objects:
+        log("ERROR: No objects imported from mesh file.")
+        sys.exit(1)
+
+    #    --- YENI EKLENECEK KISIM BASLANGICI ---
+    # Materyal isimlerini Mesh ismine göre unique yap
+    # Bu sayede Unreal'da "Material", "Material.001" çakışması olmaz.
+    # the output carries the hashed asset name, so same-named sources from different folders stay apart
+    asset_name = os.path.splitext(os.path.basename(fbx_path))[0]
+    
+    prefix_materials(asset_name)
+
+    # weld / clean / reorder / decimate before export
+    optimize_scene(parse_options(args[2:]))
+
+    # export to FBX
+    export_fbx(fbx_path)
+
     log("--- CONVERSION SUCCESSFUL ---")
 
 if __name__ == "__main__":
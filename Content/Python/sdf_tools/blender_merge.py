@@ -0,0 +1,102 @@
+import bpy
+import sys
+import os
+import json
+import numpy as np
+
+# blender runs this file as a plain script, so the sibling helpers are imported by path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from blender_convert import log, import_mesh, prefix_materials, export_fbx, parse_options, optimize_scene
+
+# unit sized primitives, the part matrix carries the real dimensions
+PRIMITIVES = {
+    "box": lambda: bpy.ops.mesh.primitive_cube_add(size=1.0),
+    "sphere": lambda: bpy.ops.mesh.primitive_uv_sphere_add(radius=0.5),
+    "cylinder": lambda: bpy.ops.mesh.primitive_cylinder_add(radius=0.5, depth=1.0),
+}
+
+def import_source(part):
+    before = set(bpy.data.objects)
+    if part["type"] in PRIMITIVES:
+        PRIMITIVES[part["type"]]()
+        obj = bpy.context.active_object
+        mat = bpy.data.materials.get("Primitive") or bpy.data.materials.new("Primitive")
+        obj.data.materials.append(mat)
+    else:
+        import_mesh(part["path"])
+    bpy.context.view_layer.update()
+    return [o for o in bpy.data.objects if o not in before]
+
+def bake(template, M):
+    # copy with its own mesh data, but keep sharing the materials
+    obj = template.copy()
+    obj.data = template.data.copy()
+    obj.parent = None
+    bpy.context.scene.collection.objects.link(obj)
+
+    W = M @ np.array(template.matrix_world)
+    mesh = obj.data
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3) @ W[:3, :3].T + W[:3, 3]
+    mesh.vertices.foreach_set("co", co.astype(np.float32).ravel())
+    if np.linalg.det(W[:3, :3]) < 0 and hasattr(mesh, "flip_normals"):
+        mesh.flip_normals()
+    mesh.update()
+    obj.matrix_world = ((1, 0, 0, 0), (0, 1, 0, 0), (0, 0, 1, 0), (0, 0, 0, 1))
+    return obj
+
+def merge():
+    argv = sys.argv
+    args = argv[argv.index("--") + 1:] if "--" in argv else []
+    if len(args) < 2:
+        log("ERROR: Missing arguments. Usage: blender --background --python blender_merge.py -- <job.json> <output.fbx>")
+        sys.exit(1)
+    job_path, fbx_path = args[0], args[1]
+
+    with open(job_path) as f:
+        job = json.load(f)
+
+    log("Cleaning scene...")
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+
+    # every source is imported once, repeated parts are copies of the same template
+    templates = {}
+    imported = []
+    baked = []
+    for part in job["parts"]:
+        key = part.get("path", part["type"])
+        if key not in templates:
+            log(f"Importing part: {key}")
+            objs = import_source(part)
+            imported += objs
+            templates[key] = [o for o in objs if o.type == 'MESH']
+        M = np.array(part["matrix"], dtype=float).reshape(4, 4)
+        baked += [bake(t, M) for t in templates[key]]
+
+    for obj in imported:
+        bpy.data.objects.remove(obj, do_unlink=True)
+
+    if not baked:
+        log("ERROR: No mesh objects to merge.")
+        sys.exit(1)
+
+    # join into one mesh, faces sharing a material end up in the same slot/section
+    bpy.ops.object.select_all(action='DESELECT')
+    for obj in baked: obj.select_set(True)
+    bpy.context.view_layer.objects.active = baked[0]
+    bpy.ops.object.join()
+    bpy.ops.object.material_slot_remove_unused()
+
+    merged = bpy.context.view_layer.objects.active
+    merged.name = job["name"]
+    merged.data.name = job["name"]
+    log(f"Merged {len(job['parts'])} parts into {len(merged.data.polygons)} faces, {len(merged.material_slots)} materials")
+
+    prefix_materials(os.path.splitext(os.path.basename(fbx_path))[0])
+    optimize_scene(parse_options(args[2:]))
+    export_fbx(fbx_path)
+    log("--- MERGE SUCCESSFUL ---")
+
+if __name__ == "__main__":
+    merge()
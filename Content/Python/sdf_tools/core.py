@@ -2,17 +2,19 @@ import unreal as ue
 import os
 from . import schema
 from . import utils
-from . import parser
-
-def load_meshes_for_model(model: schema.Model, ASSET_PKG_PATH):
+from . import analysis
+from . import importer
+from . import naming
+from . import physics
+
+def load_meshes_for_model(model: schema.Model, ASSET_PKG_PATH, service: importer.SDFImporter=None, manifest: naming.Manifest=None):
+    """Imports every mesh of the model and returns {resolved source uri: static mesh asset}."""
+    service = service or importer.get_importer()
     mesh_dict = {}
-    cube_mesh = ue.load_asset("/Engine/BasicShapes/Cube")
-    
-    uri_cache = {} 
+    cube_mesh = service.shapes["cube"]
 
-    temp_import_dir = os.path.join(ue.Paths.project_saved_dir(), "TempImportFBX")
-    if not os.path.exists(temp_import_dir):
-        os.makedirs(temp_import_dir)
+    # queue every conversion up front so Blender works while earlier meshes are imported
+    service.schedule_model(model, manifest=manifest)
 
     total_links = len(model.links)
     
@@ -29,40 +31,42 @@ def load_meshes_for_model(model: schema.Model, ASSET_PKG_PATH):
                 if not (visual and visual.geometry and visual.geometry.mesh):
                     continue
                 
-                uri = visual.geometry.mesh.uri
-                # if <uri>meshes/shelf_big_movai.dae</uri> -> make it a proper path
-                if not (uri.startswith("file://") or os.path.isabs(uri)):
-                    uri = os.path.join(os.path.dirname(model.sdf_path), uri)
-                if uri.startswith("file://"): uri = uri.replace("file://", "")
+                mesh = visual.geometry.mesh
+                uri = utils.resolve_mesh_uri(model.sdf_path, mesh.uri)
                 
-                mesh_name = visual.geometry.mesh.mesh_name
-                
-                if uri in uri_cache:
-                    mesh_dict[mesh_name] = uri_cache[uri]
+                if uri in mesh_dict:
+                    continue
+
+                # --- NAMING ---
+                key = mesh.key
+                if key is None and os.path.exists(uri):
+                    key = service.conversion_key(uri)
+                if key is None:
+                    mesh_dict[uri] = cube_mesh
+                    continue
+
+                destination_name = naming.asset_name(mesh.mesh_name, key)
+                asset_path = f"{ASSET_PKG_PATH}/{destination_name}.{destination_name}"
+
+                # --- CACHE LOOKUP ---
+                # resolved by content key, so unchanged meshes skip conversion and import
+                known_path = manifest.lookup(uri, key) if manifest else None
+                loaded_asset = service.find_asset(known_path or asset_path)
+                if loaded_asset:
+                    mesh_dict[uri] = loaded_asset
+                    if manifest: manifest.record(uri, key, known_path or asset_path, service.fingerprint(uri))
                     continue
                 
                 # --- CONVERSION ---
-                fbx_disk_path = None
-                if uri.endswith(".dae"):
+                if uri.lower().endswith(utils.CONVERTED_MESH_FORMATS):
                     slow_task.enter_progress_frame(0, f"Blender: {os.path.basename(uri)}")
-                    fbx_disk_path = utils.convert_dae_to_fbx(uri, temp_import_dir)
-                elif uri.endswith(".fbx"):
-                    fbx_disk_path = uri
+                fbx_disk_path = service.resolve_fbx(uri)
 
                 if not fbx_disk_path or not os.path.exists(fbx_disk_path):
-                    mesh_dict[mesh_name] = cube_mesh
-                    uri_cache[uri] = cube_mesh 
+                    mesh_dict[uri] = cube_mesh
                     continue
 
                 # --- IMPORT ---
-                destination_name = mesh_name
-                asset_path = f"{ASSET_PKG_PATH}/{destination_name}.{destination_name}"
-
-                if ue.EditorAssetLibrary.does_asset_exist(asset_path):
-                    loaded_asset = ue.load_asset(asset_path)
-                    mesh_dict[mesh_name] = loaded_asset
-                    uri_cache[uri] = loaded_asset 
-                    continue
 
                 task = ue.AssetImportTask()
                 task.set_editor_property("filename", fbx_disk_path)
@@ -84,55 +88,114 @@ def load_meshes_for_model(model: schema.Model, ASSET_PKG_PATH):
                 sm_data.set_editor_property("reorder_material_to_fbx_order", True)
                 
                 task.set_editor_property("options", options)
-                ue.AssetToolsHelpers.get_asset_tools().import_asset_tasks([task])
+                with service.stage("import"):
+                    ue.AssetToolsHelpers.get_asset_tools().import_asset_tasks([task])
                 
-                if ue.EditorAssetLibrary.does_asset_exist(asset_path):
-                    loaded_asset = ue.load_asset(asset_path)
-                    mesh_dict[mesh_name] = loaded_asset
-                    uri_cache[uri] = loaded_asset
-                    ue.log(f"Imported: {mesh_name}")
+                loaded_asset = service.find_asset(asset_path)
+                if loaded_asset:
+                    mesh_dict[uri] = loaded_asset
+                    if manifest: manifest.record(uri, key, asset_path, service.fingerprint(uri))
+                    ue.log(f"Imported: {destination_name}")
                 else:
-                    mesh_dict[mesh_name] = cube_mesh
-                    uri_cache[uri] = cube_mesh
+                    mesh_dict[uri] = cube_mesh
 
     return mesh_dict
 
-def run(sdf_path_arg=None, dest_pkg_arg="/Game/SDF_Imports", analyze_only=False):
+def run(sdf_path_arg=None, dest_pkg_arg="/Game/SDF_Imports", analyze_only=False, merge_fixed=True):
     # --- SETTINGS ---
     SDF_PATH = sdf_path_arg if sdf_path_arg else r"/tmp/model.sdf"
+    service = importer.get_importer()
     
     ue.log(f"Importing SDF: {SDF_PATH}")
 
+    with service.session(os.path.basename(SDF_PATH)):
+        return _run(service, SDF_PATH, dest_pkg_arg, analyze_only, merge_fixed)
+
+def _run(service: importer.SDFImporter, SDF_PATH, dest_pkg_arg, analyze_only, merge_fixed):
     # --- PARSING ---
-    model = parser.parse_sdf(SDF_PATH)
+    # in analyze mode the summary is filled while the file streams through the parser
+    summary = analysis.ModelSummary(SDF_PATH, service.files) if analyze_only else None
+    model = service.parse(SDF_PATH, summary)
     if not model:
         ue.log_error("SDF Parsing Failed!")
         return False
 
     if analyze_only:
+        summary.model_name = model.name
+        # stat based lookups only, a preview must not hash every mesh
+        manifest = service.manifest(naming.model_package_path(dest_pkg_arg, model.name))
+        summary.is_cached = lambda uri: service.is_converted(uri, manifest)
+        if merge_fixed: summary.add_merge_plan(model)
+        result = summary.to_dict()
         register_path = ue.Paths.project_saved_dir()
+        with open(os.path.join(register_path, "python_temp_result.json"), 'w') as f: f.write(analysis.to_json(result))
         log_name = "python_temp_result.txt"
         tam_yol = os.path.join(register_path, log_name)
-        with open(tam_yol, 'w') as f: f.write(parser.report(model))
+        with open(tam_yol, 'w') as f: f.write(analysis.render_text(result))
         return True
 
+    return import_model(model, dest_pkg_arg, service, merge_fixed)
+
+def run_batch(sources, dest_pkg_arg="/Game/SDF_Imports", merge_fixed=True):
+    """Imports a list (or directory) of SDF files in one pass.
+
+    All files are parsed and their mesh conversions queued first; models are then
+    imported in order while the converter workers keep running ahead of the import stage.
+    """
+    service = importer.get_importer()
+
+    sdf_paths = service.collect(sources)
+    ue.log(f"Batch importing {len(sdf_paths)} SDF files")
+
+    imported = 0
+    with service.session(f"batch of {len(sdf_paths)}"):
+        models = service.prepare(sdf_paths, merge_fixed, dest_pkg_arg)
+
+        with ue.ScopedSlowTask(len(models), "Batch importing SDF models..") as slow_task:
+            slow_task.make_dialog(True)
+            for model in models:
+                if slow_task.should_cancel():
+                    # everything was queued up front, don't leave Blender working through the rest
+                    ue.log(f"Batch cancelled, dropped {service.cancel_pending()} queued converter jobs")
+                    break
+                slow_task.enter_progress_frame(1, f"Model: {model.name}")
+                try:
+                    if import_model(model, dest_pkg_arg, service, merge_fixed): imported += 1
+                except Exception as e:
+                    ue.log_error(f"Import of {model.sdf_path} failed: {e}")
+
+    ue.log(f"Batch import finished: {imported}/{len(sdf_paths)} models")
+    return imported
+
+def import_model(model: schema.Model, dest_pkg_arg, service: importer.SDFImporter, merge_fixed=True):
     # Create target package paths
-    MODEL_PKG_PATH = f"{dest_pkg_arg}/{model.name}"
+    MODEL_PKG_PATH = naming.model_package_path(dest_pkg_arg, model.name)
     ASSET_PKG_PATH = f"{MODEL_PKG_PATH}/Assets"
+    manifest = service.manifest(MODEL_PKG_PATH)
 
     ue.log(f"Target Model Path: {MODEL_PKG_PATH}")
     ue.log(f"Target Assets Path: {ASSET_PKG_PATH}")
 
+    # --- STATIC MERGING ---
+    # fixed joint chains become one rigid body, each body's visuals one mesh
+    n_links, n_joints = len(model.links), len(model.joints)
+    model, merges = service.optimize(model, merge_fixed, manifest)
+    service.schedule_model(model, skip_links=merges, manifest=manifest)
+    model = service.apply_merges(model, merges)
+    if merge_fixed:
+        ue.log(f"Static merge: {n_links} -> {len(model.links)} links, {n_joints} -> {len(model.joints)} joints, {len(merges)} merged meshes")
+
     # --- ASSET IMPORTING ---
-    shape_cube = ue.load_asset("/Engine/BasicShapes/Cube")
-    shape_sphere = ue.load_asset("/Engine/BasicShapes/Sphere")
-    shape_cylinder = ue.load_asset("/Engine/BasicShapes/Cylinder")
+    shape_cube = service.shapes["cube"]
+    shape_sphere = service.shapes["sphere"]
+    shape_cylinder = service.shapes["cylinder"]
     
     # Import meshes and get a dictionary
-    mesh_assets = load_meshes_for_model(model, ASSET_PKG_PATH)
+    mesh_assets = load_meshes_for_model(model, ASSET_PKG_PATH, service, manifest)
+    manifest.save()
 
     # --- BLUEPRINT CREATION ---
-    model_name = model.name
+    model_name = naming.sanitize(model.name, "Model")
     
     # If BP already exists, delete it first
     bp_asset_path = f"{MODEL_PKG_PATH}/{model_name}"
@@ -144,7 +207,7 @@ def run(sdf_path_arg=None, dest_pkg_arg="/Game/SDF_Imports", analyze_only=False)
 
     # Create the BP inside the Model Folder
     bp = ue.AssetToolsHelpers.get_asset_tools().create_asset(
-        asset_name=model.name, 
+        asset_name=model_name, 
         package_path=MODEL_PKG_PATH, 
         asset_class=ue.Blueprint, 
         factory=factory
@@ -152,7 +215,7 @@ def run(sdf_path_arg=None, dest_pkg_arg="/Game/SDF_Imports", analyze_only=False)
     
     if not bp:
         ue.log_error("BP Creation Failed!")
-        return
+        return False
 
     # --- SUBOBJECT API ---
     subsys = ue.get_engine_subsystem(ue.SubobjectDataSubsystem)
@@ -169,6 +232,9 @@ def run(sdf_path_arg=None, dest_pkg_arg="/Game/SDF_Imports", analyze_only=False)
     try: scene.rename(f"Scene_{model_name}")
     except: pass
     scene.set_editor_property("mobility", ue.ComponentMobility.MOVABLE)
+
+    component_names = naming.ComponentNames()
+    link_component = {}  # link name -> name of the component carrying its body
     
     def add_sm_internal(link: schema.Link):
         components = []
@@ -183,7 +249,8 @@ def run(sdf_path_arg=None, dest_pkg_arg="/Game/SDF_Imports", analyze_only=False)
                 if not f.is_empty(): continue
                 subsys.attach_subobject(scene_handle, sm_handle)
 
-                new_name = "".join(ch if ch.isalnum() or ch in "._-" else "_" for ch in f"{link.name}")
+                new_name = component_names.unique(link.name)
+                link_component.setdefault(link.name, new_name)
                 try: subsys.rename_subobject(sm_handle, new_name)
                 except: pass
 
@@ -196,7 +263,7 @@ def run(sdf_path_arg=None, dest_pkg_arg="/Game/SDF_Imports", analyze_only=False)
                 # --- MESH CHECK ---
                 if geom.mesh:
                     # Try to find it in the mesh dictionary, otherwise use the cube
-                    target_mesh = mesh_assets.get(geom.mesh.mesh_name, shape_cube)
+                    target_mesh = mesh_assets.get(utils.resolve_mesh_uri(model.sdf_path, geom.mesh.uri), shape_cube)
                     if geom.mesh.scale:
                         target_scale = ue.Vector(*geom.mesh.scale)
 
@@ -233,7 +300,7 @@ def run(sdf_path_arg=None, dest_pkg_arg="/Game/SDF_Imports", analyze_only=False)
                 
                 sm.set_editor_property("mobility", ue.ComponentMobility.MOVABLE)
 
-                components.append(sm)
+                components.append((sm_handle, sm, visual))
 
             if components: return components
 
@@ -241,74 +308,131 @@ def run(sdf_path_arg=None, dest_pkg_arg="/Game/SDF_Imports", analyze_only=False)
         params = ue.AddNewSubobjectParams(parent_handle=scene_handle, new_class=ue.StaticMeshComponent, blueprint_context=bp)
         sm_handle, _ = subsys.add_new_subobject(params)
         subsys.attach_subobject(scene_handle, sm_handle)
+        new_name = component_names.unique(link.name)
+        link_component[link.name] = new_name
+        try: subsys.rename_subobject(sm_handle, new_name)
+        except: pass
         sm = h2o(sm_handle)
         sm.set_static_mesh(shape_cube)
         sm.set_editor_property("relative_scale3d", ue.Vector(0.1, 0.1, 0.1))
         sm.set_editor_property("mobility", ue.ComponentMobility.MOVABLE)
-        return [sm]
+        return [(sm_handle, sm, None)]
+
+    with service.stage("physics"):
+        plan = physics.plan_physics(model)
+    if plan.bodies:
+        iterations = [b.position_iterations for b in plan.bodies.values()]
+        ue.log(f"Physics plan: {len(plan.bodies)} bodies, {len(plan.constraints)} constraints, "
+               f"position iterations {min(iterations)}-{max(iterations)}")
 
     link_main_sm = {}
     for link in model.links.values():
         sms = add_sm_internal(link)
         if not sms: continue
-        main_sm = sms[0]
+        main_handle, main_sm, main_visual = sms[0]
         link_main_sm[link.name] = main_sm
 
-        if link.visuals: x, y, z, roll, pitch, yaw = utils.compose_pose(link.pose, link.visuals[0].pose)
+        if main_visual: x, y, z, roll, pitch, yaw = utils.compose_pose(link.pose, main_visual.pose)
         else: x, y, z, roll, pitch, yaw = link.pose
 
         main_sm.set_editor_property("relative_location", utils.vec_gz_to_loc_ue(x, y, z))
         main_sm.set_editor_property("relative_rotation", utils.sdf_to_unreal(roll, pitch, yaw))
 
+        # --- EXTRA VISUALS ---
+        # further visuals (e.g. of a fixed chain whose merge failed) ride on the body component;
+        # they keep their own scale, so only the location has to undo the parent scale
+        main_scale = main_sm.get_editor_property("relative_scale3d")
+        for sm_handle, sm, visual in sms[1:]:
+            subsys.attach_subobject(main_handle, sm_handle)
+            x, y, z, roll, pitch, yaw = utils.relative_pose(main_visual.pose, visual.pose)
+            loc = utils.vec_gz_to_loc_ue(x, y, z)
+            sm.set_absolute(False, False, True)
+            sm.set_editor_property("relative_location", ue.Vector(loc.x / (main_scale.x or 1.0),
+                                                                  loc.y / (main_scale.y or 1.0),
+                                                                  loc.z / (main_scale.z or 1.0)))
+            sm.set_editor_property("relative_rotation", utils.sdf_to_unreal(roll, pitch, yaw))
+
+        body = plan.bodies[link.name]
         bi = ue.BodyInstance()
-        bi.set_editor_property("position_solver_iteration_count", 255)
-        bi.set_editor_property("velocity_solver_iteration_count", 255)
+        bi.set_editor_property("position_solver_iteration_count", body.position_iterations)
+        bi.set_editor_property("velocity_solver_iteration_count", body.velocity_iterations)
         main_sm.set_editor_property("body_instance", bi)
         main_sm.set_simulate_physics(True)
         main_sm.set_enable_gravity(True)
-        main_sm.set_mass_override_in_kg("", link.inertial.mass * 1000, True)
+        main_sm.set_mass_override_in_kg("", body.mass_kg, True)
         if link.name == "link_0" or (len(link.name) == 3 and link.name.endswith("1")):
             main_sm.set_simulate_physics(False)
 
+    angular = {physics.LOCKED: ue.AngularConstraintMotion.ACM_LOCKED,
+               physics.LIMITED: ue.AngularConstraintMotion.ACM_LIMITED,
+               physics.FREE: ue.AngularConstraintMotion.ACM_FREE}
+    linear = {physics.LOCKED: ue.LinearConstraintMotion.LCM_LOCKED,
+              physics.LIMITED: ue.LinearConstraintMotion.LCM_LIMITED,
+              physics.FREE: ue.LinearConstraintMotion.LCM_FREE}
+
     for joint in model.joints.values():
         parent_sm = link_main_sm.get(joint.parent)
         child_sm  = link_main_sm.get(joint.child)
         if not parent_sm or not child_sm: continue
 
-        jx, jy, jz, jr, jp, jyaw = utils.world_pose_of_joint_childed(model, joint)
+        c = plan.constraints[joint.name]
         params = ue.AddNewSubobjectParams(parent_handle=scene_handle, new_class=ue.PhysicsConstraintComponent, blueprint_context=bp)
         pc_handle, _ = subsys.add_new_subobject(params)
         subsys.attach_subobject(scene_handle, pc_handle)
         
-        new_name = "".join(ch if ch.isalnum() or ch in "._-" else "_" for ch in f"{joint.name}")
+        new_name = component_names.unique(joint.name)
         try: subsys.rename_subobject(pc_handle, new_name)
         except: pass
         
         pc = h2o(pc_handle)
         pc.set_editor_property("mobility", ue.ComponentMobility.MOVABLE)
-        pc.set_editor_property("relative_location", utils.vec_gz_to_loc_ue(jx, jy, jz))
-        pc.set_editor_property("relative_rotation", utils.sdf_to_unreal(jr, jp, jyaw))
+        pc.set_editor_property("relative_location", ue.Vector(*c.location))
+        pc.set_editor_property("relative_rotation", c.rotation)
         
         cn1 = ue.ConstrainComponentPropName()
-        cn1.set_editor_property("component_name", joint.child)
+        cn1.set_editor_property("component_name", link_component.get(joint.child, joint.child))
         pc.set_editor_property("component_name1", cn1)
         cn2 = ue.ConstrainComponentPropName()
-        cn2.set_editor_property("component_name", joint.parent)
+        cn2.set_editor_property("component_name", link_component.get(joint.parent, joint.parent))
         pc.set_editor_property("component_name2", cn2)
         
         pc.set_disable_collision(True)
-        pc.set_angular_swing1_limit(ue.AngularConstraintMotion.ACM_LOCKED, 0.1)
-        pc.set_angular_swing2_limit(ue.AngularConstraintMotion.ACM_FREE, 0.1)
-        pc.set_angular_twist_limit(ue.AngularConstraintMotion.ACM_LOCKED, 0.1)
-        pc.set_linear_x_limit(ue.LinearConstraintMotion.LCM_LOCKED, 0.0)
+        pc.set_angular_swing1_limit(angular[c.swing1], 0.1)
+        pc.set_angular_swing2_limit(angular[c.swing2], 0.1)
+        pc.set_angular_twist_limit(angular[c.twist], max(c.twist_limit, 0.1))
+        if c.twist_offset:
+            try:
+                ci = pc.get_editor_property("constraint_instance")
+                ci.set_editor_property("angular_rotation_offset", ue.Rotator(c.twist_offset, 0.0, 0.0))
+                pc.set_editor_property("constraint_instance", ci)
+            except Exception as e:
+                ue.log_warning(f"Could not offset twist limit of {joint.name}: {e}")
+        pc.set_linear_x_limit(linear[c.linear_x], c.linear_limit)
+        if c.linear_offset:
+            # both frames start at the component, so moving it wouldn't recentre the limit; the child
+            # frame is placed behind the joint origin instead (reference positions are in body space)
+            try:
+                unit = ue.Vector(1.0, 1.0, 1.0)
+                joint_tf = ue.Transform(pc.get_editor_property("relative_location"), pc.get_editor_property("relative_rotation"), unit)
+                child_tf = ue.Transform(child_sm.get_editor_property("relative_location"), child_sm.get_editor_property("relative_rotation"), unit)
+                anchor = joint_tf.transform_location(ue.Vector(-c.linear_offset, 0.0, 0.0))
+                pc.set_constraint_reference_position(ue.ConstraintFrame.FRAME1, child_tf.inverse_transform_location(anchor))
+            except Exception as e:
+                ue.log_warning(f"Could not offset linear limit of {joint.name}: {e}")
         pc.set_linear_y_limit(ue.LinearConstraintMotion.LCM_LOCKED, 0.0)
         pc.set_linear_z_limit(ue.LinearConstraintMotion.LCM_LOCKED, 0.0)
-        pc.set_angular_drive_mode(ue.AngularDriveMode.TWIST_AND_SWING)
-        pc.set_orientation_drive_twist_and_swing(True, True)
-        pc.set_angular_velocity_drive_twist_and_swing(True, True)
-        pc.set_angular_drive_params(100000.0, 100.0, 0.0)
+        if c.angular_drive:
+            pc.set_angular_drive_mode(ue.AngularDriveMode.TWIST_AND_SWING)
+            pc.set_orientation_drive_twist_and_swing(c.angular_drive["orientation"], False)
+            pc.set_angular_velocity_drive_twist_and_swing(c.angular_drive["velocity"], False)
+            pc.set_angular_drive_params(*c.angular_drive["params"])
+        if c.linear_drive:
+            pc.set_linear_position_drive(True, False, False)
+            pc.set_linear_velocity_drive(True, False, False)
+            pc.set_linear_drive_params(*c.linear_drive["params"])
 
     ue.BlueprintEditorLibrary.compile_blueprint(bp)
     ue.EditorAssetLibrary.save_loaded_asset(bp)
     
-    ue.log("SDF Import Completed.")
\ No newline at end of file
+    ue.log("SDF Import Completed.")
+    return True
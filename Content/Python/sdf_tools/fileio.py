@@ -0,0 +1,110 @@
+# sdf_tools/fileio.py
+import os
+import re
+import mmap
+import hashlib
+import numpy as np
+
+XML_FEED_CHUNK = 1 << 20   # 1 MiB slices fed to the XML parser
+HASH_CHUNK = 8 << 20
+
+DAE_PRIMITIVE_COUNT = re.compile(rb'<(triangles|polylist|polygons)\b[^>]*?\bcount="(\d+)"')
+
+# binary STL: 80 byte header, uint32 count, then 50 byte records
+STL_TRIANGLE = np.dtype([("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)), ("attr", "<u2")])
+
+class MappedFiles:
+    """Maps every input file once per import and hands out zero-copy views of the mapping."""
+
+    def __init__(self):
+        self._maps = {}      # path -> mmap (None for empty files)
+        self._digests = {}   # path -> sha1 hex digest
+        self.bytes_read = 0  # bytes actually scanned, mapping alone doesn't read anything
+
+    def view(self, path):
+        path = os.path.abspath(path)
+        if path not in self._maps:
+            # the mapping outlives the descriptor, so batches don't pile up open files
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                # zero-length files can't be mapped
+                self._maps[path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        mm = self._maps[path]
+        return memoryview(mm) if mm is not None else memoryview(b"")
+
+    def touch(self, nbytes):
+        # for callers that scan a view themselves
+        self.bytes_read += nbytes
+
+    def chunks(self, path, chunk_size=XML_FEED_CHUNK):
+        """Yields consecutive slices of the mapping, counting them as read."""
+        for chunk in iter_chunks(self.view(path), chunk_size):
+            self.bytes_read += len(chunk)
+            yield chunk
+
+    def digest(self, path):
+        path = os.path.abspath(path)
+        digest = self._digests.get(path)
+        if digest is None:
+            h = hashlib.sha1()
+            for chunk in self.chunks(path, HASH_CHUNK):
+                h.update(chunk)
+            digest = h.hexdigest()
+            self._digests[path] = digest
+        return digest
+
+    def close(self):
+        for mm in self._maps.values():
+            if mm is None: continue
+            try: mm.close()
+            except BufferError: pass  # a caller still holds a view, the mapping goes away with it
+        self._maps.clear()
+        self._digests.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def iter_chunks(buffer, chunk_size=XML_FEED_CHUNK):
+    for off in range(0, len(buffer), chunk_size):
+        yield buffer[off:off + chunk_size]
+
+def stl_triangles(buffer):
+    """Returns an (N, 3, 3) float32 view over the vertices of a binary STL, or None for ASCII STL."""
+    if len(buffer) < 84:
+        return None
+    count = int(np.frombuffer(buffer, dtype="<u4", count=1, offset=80)[0])
+    if 84 + count * STL_TRIANGLE.itemsize != len(buffer):
+        return None
+    return np.frombuffer(buffer, dtype=STL_TRIANGLE, count=count, offset=84)["vertices"]
+
+def dae_triangle_estimate(buffer):
+    """Sums the primitive counts declared by a COLLADA file without building its DOM."""
+    total = 0
+    for match in DAE_PRIMITIVE_COUNT.finditer(buffer):
+        count = int(match.group(2))
+        # polygons/polylists are mostly quads in CAD exports
+        total += count if match.group(1) == b"triangles" else count * 2
+    return total
+
+def reset_peak_rss():
+    """Resets the kernel's resident memory high-water mark (VmHWM), so the next peak is per import."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def peak_rss_bytes():
+    # VmHWM is reported in kB
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
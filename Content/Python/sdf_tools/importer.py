@@ -0,0 +1,403 @@
+# sdf_tools/importer.py
+import os
+import time
+import json
+import hashlib
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+import unreal as ue
+from . import parser
+from . import utils
+from . import fileio
+from . import merge
+from . import naming
+from . import supervisor
+
+# Blender runs in its own process, so threads are enough to keep several converters busy
+MAX_CONVERTER_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))
+# .world files hold a <world>, not a top level <model>, so parse_sdf can't read them
+SDF_EXTENSIONS = (".sdf",)
+
+class SDFImporter:
+    """Long-lived import service that keeps caches and converter workers warm between imports."""
+
+    def __init__(self, max_workers=MAX_CONVERTER_WORKERS):
+        self.max_workers = max_workers
+        self.parse_cache = {}   # sdf path -> (stat key, model)
+        self.conversions = {}   # mesh content digest -> Future[fbx path or None]
+        self.content_keys = {}  # mesh path -> (stat key, content digest), unchanged files aren't hashed again
+        self.merges = {}        # merge job key -> (mesh name, key, Future[fbx path or None])
+        self.asset_cache = {}   # asset path -> loaded asset
+        self.manifests = {}     # model package path -> naming.Manifest
+        self.stats = {}
+        self.files = None       # MappedFiles of the running import session
+        self._shapes = None
+        self._executor = None
+        self._quarantine = None
+
+    # --- SHARED STATE ---
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sdf_convert")
+        return self._executor
+
+    @property
+    def shapes(self):
+        if self._shapes is None:
+            self._shapes = {
+                "cube": ue.load_asset("/Engine/BasicShapes/Cube"),
+                "sphere": ue.load_asset("/Engine/BasicShapes/Sphere"),
+                "cylinder": ue.load_asset("/Engine/BasicShapes/Cylinder"),
+            }
+        return self._shapes
+
+    @property
+    def quarantine(self):
+        if self._quarantine is None:
+            path = os.path.join(ue.Paths.project_saved_dir(), "SDFImport", "quarantine.json")
+            self._quarantine = supervisor.Quarantine(path)
+        return self._quarantine
+
+    @property
+    def temp_import_dir(self):
+        path = os.path.join(ue.Paths.project_saved_dir(), "TempImportFBX")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def cancel_pending(self):
+        """Cancels queued conversions and merges that haven't started; running Blender jobs finish."""
+        cancelled = 0
+        for key, future in list(self.conversions.items()):
+            if future.cancel():
+                del self.conversions[key]
+                cancelled += 1
+        for key, (_, _, future) in list(self.merges.items()):
+            if future.cancel():
+                del self.merges[key]
+                cancelled += 1
+        return cancelled
+
+    # --- INSTRUMENTATION ---
+    def reset_stats(self):
+        self.stats = {"timings": {}, "conversions": 0, "parse_cache_hits": 0, "asset_cache_hits": 0, "quarantined": 0,
+                      "mesh_before": {}, "mesh_after": {}, "optimized_files": set()}
+
+    @contextmanager
+    def session(self, label):
+        """Scope of one import (or batch): resets stats, owns the mapped input files and logs the totals."""
+        self.reset_stats()
+        self.files = fileio.MappedFiles()
+        # without the reset VmHWM would be the editor's lifetime peak
+        self.stats["peak_rss_reset"] = fileio.reset_peak_rss()
+        try:
+            yield self
+        finally:
+            self.stats["bytes_read"] = self.files.bytes_read
+            self.stats["peak_rss"] = fileio.peak_rss_bytes()
+            self.files.close()
+            self.files = None
+            self.log_stats(label)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings = self.stats.setdefault("timings", {})
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+    def log_stats(self, label):
+        timings = ", ".join(f"{k}={v:.2f}s" for k, v in self.stats.get("timings", {}).items())
+        memory = ""
+        if self.stats.get("peak_rss") is not None:
+            scope = "" if self.stats.get("peak_rss_reset") else " (editor lifetime)"
+            memory = f" peak_rss={self.stats['peak_rss'] / 2**20:.1f}MiB{scope}"
+        ue.log(f"[{label}] {timings} | conversions={self.stats.get('conversions', 0)} merges={self.stats.get('merges', 0)} "
+               f"parse_cache_hits={self.stats.get('parse_cache_hits', 0)} "
+               f"asset_cache_hits={self.stats.get('asset_cache_hits', 0)} quarantined={self.stats.get('quarantined', 0)} "
+               f"bytes_read={self.stats.get('bytes_read', 0) / 2**20:.1f}MiB{memory}")
+        before, after = self.stats.get("mesh_before"), self.stats.get("mesh_after")
+        if before:
+            ue.log(f"[{label}] mesh optimization: vertices {before['vertices']} -> {after['vertices']}, "
+                   f"triangles {before['triangles']} -> {after['triangles']}, "
+                   f"bytes {before['bytes'] / 2**20:.1f}MiB -> {after['bytes'] / 2**20:.1f}MiB")
+
+    def record_mesh_stats(self, fbx_path):
+        # written next to the FBX by the Blender side optimization stage
+        if not fbx_path or fbx_path in self.stats.setdefault("optimized_files", set()):
+            return
+        stats = utils.read_mesh_stats(fbx_path)
+        if not stats:
+            return
+        self.stats["optimized_files"].add(fbx_path)
+        for which in ("before", "after"):
+            total = self.stats.setdefault(f"mesh_{which}", {})
+            for k, v in stats[which].items():
+                total[k] = total.get(k, 0) + v
+
+    # --- PARSE STAGE ---
+    def parse(self, sdf_path, listener=None):
+        key = _stat_key(sdf_path)
+        cached = self.parse_cache.get(sdf_path)
+        if key is not None and cached and cached[0] == key:
+            self.stats["parse_cache_hits"] = self.stats.get("parse_cache_hits", 0) + 1
+            if listener: listener.add_model(cached[1])
+            return cached[1]
+
+        with self.stage("parse"):
+            model = parser.parse_sdf(sdf_path, self.files, listener)
+        if model is not None and key is not None:
+            self.parse_cache[sdf_path] = (key, model)
+        return model
+
+    # --- CONVERSION STAGE ---
+    def content_digest(self, uri):
+        stat = _stat_key(uri)
+        known = self.content_keys.get(uri)
+        if stat is not None and known and known[0] == stat:
+            return known[1]
+        with self.stage("hash"):
+            if self.files is not None:
+                digest = self.files.digest(uri)
+            else:
+                digest = hashlib.sha1(f"{uri}|{stat}".encode()).hexdigest()
+        if stat is not None:
+            self.content_keys[uri] = (stat, digest)
+        return digest
+
+    def conversion_key(self, uri):
+        # keyed by content so identical meshes under different paths convert once,
+        # and by the optimization settings so changing them produces new FBX files and assets
+        digest = self.content_digest(uri)
+        if not uri.lower().endswith(utils.CONVERTED_MESH_FORMATS):
+            return digest
+        return hashlib.sha1(f"{digest}|{utils.mesh_optimize_signature()}".encode()).hexdigest()
+
+    def fingerprint(self, uri):
+        """Size and mtime of a source file (plus the settings it converts with), checkable without reading it."""
+        stat = _stat_key(uri)
+        if stat is None:
+            return None
+        if not uri.lower().endswith(utils.CONVERTED_MESH_FORMATS):
+            return f"{stat[0]}:{stat[1]}"
+        settings = hashlib.sha1(utils.mesh_optimize_signature().encode()).hexdigest()[:naming.HASH_LEN]
+        return f"{stat[0]}:{stat[1]}:{settings}"
+
+    def is_converted(self, uri, manifest: naming.Manifest=None):
+        """True if uri is already converted (this session) or imported (manifest), decided from file stats only."""
+        stat = _stat_key(uri)
+        known = self.content_keys.get(uri)
+        if stat is not None and known and known[0] == stat:
+            future = self.conversions.get(self.conversion_key(uri))
+            if future and future.done() and not future.exception() and future.result() and os.path.exists(future.result()):
+                return True
+        if manifest:
+            asset = manifest.lookup_fingerprint(uri, self.fingerprint(uri))
+            return bool(asset and ue.EditorAssetLibrary.does_asset_exist(asset))
+        return False
+
+    def _supervised_job(self, key, source, log_path, fn, *args):
+        # runs on a worker thread; an input the converter failed on once is not worth another Blender run
+        # per import. Setup problems (no helper script, source gone) never got to Blender and aren't quarantined,
+        # nor are runs killed from outside (OOM killer, user)
+        fbx_path, job = fn(*args)
+        if fbx_path is None and job is not None and not job.killed_externally:
+            reason = job.reason() if not job.ok else "no FBX written"
+            self.quarantine.add(key, source, reason, log_path)
+            print(f"Quarantined {source} ({reason}), see {log_path}")
+        return fbx_path
+
+    def _is_quarantined(self, key, source):
+        entry = self.quarantine.get(key)
+        if entry:
+            self.stats["quarantined"] = self.stats.get("quarantined", 0) + 1
+            ue.log_warning(f"Skipping known-bad input {source} ({entry.get('reason')}, log: {entry.get('log')})")
+        return bool(entry)
+
+    def submit_conversion(self, uri):
+        """Schedules a mesh -> FBX conversion on the worker pool, reusing in-flight and finished jobs."""
+        if not uri.lower().endswith(utils.CONVERTED_MESH_FORMATS) or not os.path.exists(uri):
+            return None
+        key = self.conversion_key(uri)
+        future = self.conversions.get(key)
+        if future is not None and not (future.done() and future.exception()):
+            return future
+        if self._is_quarantined(key, uri):
+            return None
+        # hashed names keep same-named meshes from different folders apart
+        out_dir = os.path.join(self.temp_import_dir, "Converted")
+        fbx_name = naming.asset_name(naming.readable_name(uri), key)
+        log_path = utils.blender_log_path(out_dir, fbx_name)
+        future = self.executor.submit(self._supervised_job, key, uri, log_path,
+                                      utils.convert_mesh_to_fbx, uri, out_dir, fbx_name)
+        self.conversions[key] = future
+        self.stats["conversions"] = self.stats.get("conversions", 0) + 1
+        return future
+
+    def schedule_model(self, model, skip_links=(), manifest: naming.Manifest=None):
+        for name, link in model.links.items():
+            if name in skip_links: continue
+            for uri in utils.mesh_uris(model, [link]):
+                # already imported under the same content key, nothing to convert
+                if manifest and os.path.exists(uri) and manifest.lookup(uri, self.conversion_key(uri)): continue
+                self.submit_conversion(uri)
+
+    # --- MERGE STAGE ---
+    def merge_key(self, job):
+        # the job layout, the optimization settings and the content of every mesh it reads
+        h = hashlib.sha1(json.dumps(job, sort_keys=True).encode())
+        h.update(utils.mesh_optimize_signature().encode())
+        for part in job["parts"]:
+            if part["type"] == "mesh":
+                h.update(self.conversion_key(part["path"]).encode())
+        return h.hexdigest()
+
+    def submit_merge(self, job, manifest: naming.Manifest=None):
+        """Schedules a Blender merge job unless the manifest already holds its asset."""
+        key = self.merge_key(job)
+        out_dir = os.path.join(self.temp_import_dir, "Merged")
+        fbx_name = naming.asset_name(job["name"], key)
+        fbx_path = os.path.join(out_dir, f"{fbx_name}.fbx")
+        # only trusted while something is left to import from: the merged FBX or the asset itself
+        known = manifest.lookup(fbx_path, key) if manifest else None
+        if known and (os.path.exists(fbx_path) or ue.EditorAssetLibrary.does_asset_exist(known)):
+            done = Future()
+            done.set_result(fbx_path)
+            return (job["name"], key, done)
+
+        entry = self.merges.get(key)
+        if entry is not None and not (entry[2].done() and entry[2].exception()):
+            return entry
+        if self._is_quarantined(key, job["name"]):
+            failed = Future()
+            failed.set_result(None)
+            return (job["name"], key, failed)
+        log_path = utils.blender_log_path(out_dir, fbx_name)
+        entry = (job["name"], key, self.executor.submit(self._supervised_job, key, job["name"], log_path,
+                                                        utils.merge_meshes_to_fbx, job, out_dir, fbx_name))
+        self.merges[key] = entry
+        self.stats["merges"] = self.stats.get("merges", 0) + 1
+        return entry
+
+    def optimize(self, model, merge_fixed=True, manifest: naming.Manifest=None):
+        """Collapses fixed joint chains and queues one merged mesh per multi-visual link.
+
+        Returns the optimized model (the cached one is never modified) and {link name: (mesh name, future)}.
+        """
+        if not merge_fixed:
+            return model, {}
+        with self.stage("optimize"):
+            model = merge.collapse_fixed_joints(model)
+            merges = {}
+            for link in model.links.values():
+                job = merge.visual_merge_job(model, link)
+                if job: merges[link.name] = self.submit_merge(job, manifest)
+        return model, merges
+
+    def apply_merges(self, model, merges):
+        for link_name, (mesh_name, key, future) in merges.items():
+            with self.stage("merge_wait"):
+                fbx_path = future.result() if not future.exception() else None
+            if fbx_path:
+                self.record_mesh_stats(fbx_path)
+                model = merge.with_merged_visual(model, link_name, mesh_name, fbx_path, key)
+            else:
+                ue.log_warning(f"Mesh merge failed for {link_name}, keeping separate visuals")
+        return model
+
+    def resolve_fbx(self, uri):
+        """Waits for the conversion of uri (if any) and returns the FBX path to import."""
+        if uri.endswith(".fbx"):
+            return uri
+        future = self.submit_conversion(uri)
+        if future is None:
+            return None
+        with self.stage("convert_wait"):
+            if future.exception():
+                ue.log_error(f"Conversion of {uri} failed: {future.exception()}")
+                return None
+            fbx_path = future.result()
+        self.record_mesh_stats(fbx_path)
+        return fbx_path
+
+    # --- ASSET LOOKUP ---
+    def find_asset(self, asset_path):
+        asset = self.asset_cache.get(asset_path)
+        if asset is not None:
+            # the user may have deleted it since, then it has to be imported again
+            if ue.EditorAssetLibrary.does_asset_exist(asset_path):
+                self.stats["asset_cache_hits"] = self.stats.get("asset_cache_hits", 0) + 1
+                return asset
+            self.forget_asset(asset_path)
+            asset = None
+        if ue.EditorAssetLibrary.does_asset_exist(asset_path):
+            asset = ue.load_asset(asset_path)
+            self.asset_cache[asset_path] = asset
+        return asset
+
+    def forget_asset(self, asset_path):
+        self.asset_cache.pop(asset_path, None)
+
+    def manifest(self, model_pkg_path):
+        manifest = self.manifests.get(model_pkg_path)
+        if manifest is None:
+            path = os.path.join(ue.Paths.project_saved_dir(), "SDFImport", "Manifests", naming.manifest_file_name(model_pkg_path))
+            manifest = naming.Manifest.load(path, model_pkg_path)
+            self.manifests[model_pkg_path] = manifest
+        return manifest
+
+    # --- BATCH INPUT ---
+    def collect(self, sources):
+        """Expands a directory or a list of files/directories into a sorted list of SDF paths."""
+        if isinstance(sources, str):
+            sources = [sources]
+        paths = []
+        for src in sources:
+            if os.path.isdir(src):
+                for dirpath, _, filenames in os.walk(src):
+                    paths.extend(os.path.join(dirpath, f) for f in filenames if f.lower().endswith(SDF_EXTENSIONS))
+            else:
+                paths.append(src)
+        return sorted(dict.fromkeys(paths))
+
+    def prepare(self, sdf_paths, merge_fixed=True, dest_pkg=None):
+        """Front stage of the batch pipeline: parses every file and queues all of their conversions."""
+        models = []
+        for sdf_path in sdf_paths:
+            model = self.parse(sdf_path)
+            if not model:
+                ue.log_error(f"SDF Parsing Failed: {sdf_path}")
+                continue
+            manifest = self.manifest(naming.model_package_path(dest_pkg, model.name)) if dest_pkg else None
+            optimized, merges = self.optimize(model, merge_fixed, manifest)
+            self.schedule_model(optimized, skip_links=merges, manifest=manifest)
+            models.append(model)
+        return models
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+_importer = None
+
+def get_importer():
+    global _importer
+    if _importer is None:
+        _importer = SDFImporter()
+    return _importer
+
+def reset_importer():
+    global _importer
+    if _importer is not None:
+        _importer.shutdown()
+    _importer = None
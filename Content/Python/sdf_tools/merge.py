@@ -0,0 +1,132 @@
+# sdf_tools/merge.py
+import os
+import numpy as np
+from . import schema
+from . import utils
+
+ZERO_POSE = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+PLACEHOLDER_SIZE = (0.1, 0.1, 0.1)   # metres
+
+def fixed_bodies(model: schema.Model):
+    """Maps every link to the link that owns its rigid body once fixed joints are collapsed."""
+    fixed_parent = {}
+    for joint in model.joints.values():
+        if joint.joint_type == "fixed" and joint.parent in model.links and joint.child in model.links:
+            fixed_parent[joint.child] = joint.parent
+
+    body_of = {}
+    for name in model.links:
+        chain = [name]
+        while chain[-1] in fixed_parent and fixed_parent[chain[-1]] not in chain:
+            chain.append(fixed_parent[chain[-1]])
+        body_of[name] = chain[-1]
+    return body_of
+
+def combine_inertials(body_pose, links):
+    """Sums the inertials of links rigidly attached to a body, expressed in the body frame."""
+    T_body_inv = np.linalg.inv(utils.pose_to_matrix(body_pose))
+    T = np.stack([T_body_inv @ utils.pose_to_matrix(l.pose) @ utils.pose_to_matrix(l.inertial.pose) for l in links])
+    m = np.array([l.inertial.mass for l in links], dtype=float)
+    I = np.array([[[i.ixx, i.ixy, i.ixz], [i.ixy, i.iyy, i.iyz], [i.ixz, i.iyz, i.izz]]
+                  for i in (l.inertial.inertia for l in links)], dtype=float)
+
+    total = m.sum()
+    p = T[:, :3, 3]
+    R = T[:, :3, :3]
+    com = (m[:, None] * p).sum(axis=0) / total if total > 0 else p.mean(axis=0)
+
+    # rotate every tensor into the body axes, then shift it to the common COM (parallel axis theorem)
+    I_body = np.einsum("nij,njk,nlk->nil", R, I, R)
+    d = p - com
+    shift = m[:, None, None] * (np.einsum("ni,ni->n", d, d)[:, None, None] * np.eye(3) - np.einsum("ni,nj->nij", d, d))
+    I_sum = (I_body + shift).sum(axis=0)
+
+    inertia = schema.Inertia(*(float(I_sum[i, j]) for i, j in ((0, 0), (0, 1), (0, 2), (1, 1), (1, 2), (2, 2))))
+    return schema.Inertial(float(total), (float(com[0]), float(com[1]), float(com[2]), 0.0, 0.0, 0.0), inertia)
+
+def collapse_fixed_joints(model: schema.Model):
+    """Returns a new model where every chain of fixed joints is a single link (the chain's root).
+
+    Visuals and collisions of the merged links are re-posed into the root link frame, inertials are
+    summed, and the remaining joints are re-attached to the surviving links.
+    """
+    body_of = fixed_bodies(model)
+    members = {}
+    for name, body in body_of.items():
+        members.setdefault(body, []).append(model.links[name])
+
+    links = {}
+    for body_name, group in members.items():
+        body = model.links[body_name]
+        if len(group) == 1:
+            links[body_name] = body
+            continue
+
+        visuals, collisions = [], []
+        for link in group:
+            rel = utils.relative_pose(body.pose, link.pose)
+            visuals += [schema.Visual(utils.compose_pose(rel, v.pose), v.geometry, v.transparency, v.cast_shadows)
+                        for v in link.visuals]
+            collisions += [schema.Collision(c.name, utils.compose_pose(rel, c.pose), c.geometry, c.surface)
+                           for c in link.collisions]
+        links[body_name] = schema.Link(body_name, body.pose, visuals, collisions, combine_inertials(body.pose, group))
+
+    joints = {}
+    for joint in model.joints.values():
+        if joint.joint_type == "fixed" and body_of.get(joint.child, joint.child) == body_of.get(joint.parent, joint.parent):
+            continue
+        parent = body_of.get(joint.parent, joint.parent)
+        child = body_of.get(joint.child, joint.child)
+        pose = joint.pose
+        # the joint pose is relative to the child link, which may now be part of a bigger body
+        if child != joint.child:
+            pose = utils.compose_pose(utils.relative_pose(model.links[child].pose, model.links[joint.child].pose), joint.pose)
+        joints[joint.name] = schema.Joint(joint.name, parent, child, joint.joint_type, joint.axis, pose,
+                                          joint.limit, joint.dynamics)
+
+    return schema.Model(model.name, links, joints, model.sdf_path)
+
+def visual_merge_job(model: schema.Model, link: schema.Link):
+    """Describes all visuals of a link as parts of a single mesh, posed in the link frame.
+
+    Returns None when the link has nothing to merge. Each part carries a 4x4 row-major matrix
+    (pose and scale) and either a mesh path or a primitive description for blender_merge.py.
+    """
+    visuals = [v for v in link.visuals if v and v.geometry]
+    if len(visuals) < 2:
+        return None
+
+    parts = []
+    for visual in visuals:
+        geom = visual.geometry
+        if geom.mesh:
+            uri = utils.resolve_mesh_uri(model.sdf_path, geom.mesh.uri)
+            if os.path.exists(uri):
+                part = {"type": "mesh", "path": uri, "matrix": utils.pose_to_matrix(visual.pose, geom.mesh.scale or (1, 1, 1))}
+            else:
+                # same 10 cm cube the unmerged import uses for a missing mesh
+                print(f"Warning: mesh not found for {link.name}, merging a placeholder cube: {uri}")
+                part = {"type": "box", "matrix": utils.pose_to_matrix(visual.pose, PLACEHOLDER_SIZE)}
+        elif geom.box:
+            part = {"type": "box", "matrix": utils.pose_to_matrix(visual.pose, geom.box.size)}
+        elif geom.sphere:
+            d = geom.sphere.radius * 2.0
+            part = {"type": "sphere", "matrix": utils.pose_to_matrix(visual.pose, (d, d, d))}
+        elif geom.cylinder:
+            d = geom.cylinder.radius * 2.0
+            part = {"type": "cylinder", "matrix": utils.pose_to_matrix(visual.pose, (d, d, geom.cylinder.length))}
+        else:
+            continue
+        part["matrix"] = part["matrix"].ravel().tolist()
+        parts.append(part)
+
+    return {"name": f"{link.name}_merged", "parts": parts} if len(parts) > 1 else None
+
+def with_merged_visual(model: schema.Model, link_name, mesh_name, fbx_path, key=None):
+    """Returns a copy of model whose link uses one pre-merged mesh in place of its visuals."""
+    link = model.links[link_name]
+    cast_shadows = any(v.cast_shadows for v in link.visuals if v)
+    visual = schema.Visual(ZERO_POSE, schema.Geometry(mesh=schema.Mesh(mesh_name, fbx_path, key=key)), 0.0, cast_shadows)
+    links = dict(model.links)
+    links[link_name] = schema.Link(link.name, link.pose, [visual], link.collisions, link.inertial)
+    return schema.Model(model.name, links, model.joints, model.sdf_path)
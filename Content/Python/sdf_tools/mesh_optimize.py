@@ -0,0 +1,114 @@
+# sdf_tools/mesh_optimize.py
+# Pure NumPy mesh cleanup, shared by the Blender side scripts (no bpy / unreal imports here).
+import numpy as np
+
+# rough in-engine footprint per vertex (position, normal, tangent, one UV) and per triangle (3 x uint32)
+VERTEX_BYTES = 12 + 12 + 16 + 8
+TRIANGLE_BYTES = 12
+
+def mesh_stats(n_vertices, n_triangles):
+    return {"vertices": int(n_vertices), "triangles": int(n_triangles),
+            "bytes": int(n_vertices * VERTEX_BYTES + n_triangles * TRIANGLE_BYTES)}
+
+def quantize(positions, bits):
+    """Snaps positions to a 2^bits grid spanning the mesh bounds."""
+    lo, hi = positions.min(axis=0), positions.max(axis=0)
+    step = np.where(hi > lo, (hi - lo) / (2 ** bits - 1), 1.0)
+    return np.round((positions - lo) / step) * step + lo
+
+def _weld_cells(positions, cells):
+    _, first, remap = np.unique(cells, axis=0, return_index=True, return_inverse=True)
+    return positions[first], remap.reshape(-1)
+
+def weld(positions, tolerance):
+    """Merges vertices closer than tolerance (grid based).
+
+    A second pass on a grid shifted by half a cell catches pairs split by a cell boundary of the
+    first one, so any two vertices within tolerance / 2 per axis end up merged.
+    Returns (welded positions, remap) where remap[old index] = new index.
+    """
+    if len(positions) == 0:
+        return positions, np.zeros(0, dtype=np.int64)
+    if tolerance <= 0:
+        return _weld_cells(positions, positions)
+    positions, remap = _weld_cells(positions, np.floor(positions / tolerance).astype(np.int64))
+    positions, shifted = _weld_cells(positions, np.floor(positions / tolerance + 0.5).astype(np.int64))
+    return positions, shifted[remap]
+
+def clean_triangles(triangles, positions, area_epsilon=1e-12):
+    """Mask of triangles to keep: drops degenerate ones and exact duplicates (same winding)."""
+    a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+    keep = (a != b) & (b != c) & (a != c)
+
+    p = positions[triangles]
+    area2 = np.linalg.norm(np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0]), axis=1)
+    keep &= area2 > area_epsilon
+
+    # rotate each triangle so its smallest index is first; winding is preserved, so back faces survive
+    shift = np.argmin(triangles, axis=1)
+    rows = np.arange(len(triangles))[:, None]
+    canonical = triangles[rows, (np.arange(3)[None, :] + shift[:, None]) % 3]
+    candidates = np.flatnonzero(keep)
+    _, first = np.unique(canonical[candidates], axis=0, return_index=True)
+    keep[:] = False
+    keep[candidates[first]] = True
+    return keep
+
+def _morton3(cells):
+    # interleaves three 10 bit integers into one 30 bit key
+    x = cells.astype(np.uint64) & 0x3FF
+    out = np.zeros(len(cells), dtype=np.uint64)
+    for bit in range(10):
+        for axis in range(3):
+            out |= ((x[:, axis] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(3 * bit + axis)
+    return out
+
+def reorder(triangles, positions):
+    """Orders triangles along a Z-order curve and renumbers vertices by first use.
+
+    Neighbouring triangles end up close in the index buffer (post-transform cache hits) and the
+    vertices they use close in the vertex buffer (pre-transform fetch locality).
+    Returns (triangle order, vertex order, remapped triangles).
+    """
+    if len(triangles) == 0:
+        # nothing references any vertex, so none are kept
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), triangles
+    centroids = positions[triangles].mean(axis=1)
+    lo, hi = centroids.min(axis=0), centroids.max(axis=0)
+    cells = (centroids - lo) / np.where(hi > lo, hi - lo, 1.0) * 1023
+    tri_order = np.argsort(_morton3(cells), kind="stable")
+    ordered = triangles[tri_order]
+
+    flat = ordered.reshape(-1)
+    used, first_use = np.unique(flat, return_index=True)
+    vertex_order = used[np.argsort(first_use, kind="stable")]
+    new_index = np.empty(len(positions), dtype=np.int64)
+    new_index[vertex_order] = np.arange(len(vertex_order))
+    return tri_order, vertex_order, new_index[flat].reshape(-1, 3)
+
+def optimize(positions, triangles, weld_tolerance=1e-5, quantize_bits=None):
+    """Runs quantize -> weld -> clean -> reorder on an indexed triangle mesh.
+
+    Returns a dict with the new positions, triangles, the indices of the kept source triangles
+    (in their new order, to carry per-corner attributes along) and before/after stats.
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    before = mesh_stats(len(positions), len(triangles))
+
+    if quantize_bits and len(positions):
+        positions = quantize(positions, quantize_bits)
+    positions, remap = weld(positions, weld_tolerance)
+    welded = remap[triangles]
+
+    kept = np.flatnonzero(clean_triangles(welded, positions))
+    tri_order, vertex_order, new_triangles = reorder(welded[kept], positions)
+
+    new_positions = positions[vertex_order]
+    return {
+        "positions": new_positions,
+        "triangles": new_triangles,
+        "source_triangles": kept[tri_order],
+        "before": before,
+        "after": mesh_stats(len(new_positions), len(new_triangles)),
+    }
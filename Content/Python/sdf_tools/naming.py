@@ -0,0 +1,99 @@
+# sdf_tools/naming.py
+import os
+import re
+import json
+import hashlib
+
+HASH_LEN = 8
+MAX_PREFIX_LEN = 48
+
+_INVALID_ASSET_CHARS = re.compile(r"[^A-Za-z0-9_]+")
+_INVALID_COMPONENT_CHARS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+def sanitize(name, fallback="Unnamed", max_len=MAX_PREFIX_LEN):
+    """Unreal-safe asset name: letters, digits and single underscores."""
+    name = _INVALID_ASSET_CHARS.sub("_", name).strip("_")
+    return (name[:max_len] if max_len else name) or fallback
+
+def readable_name(uri):
+    # "meshes/base.link.dae" -> "base_link"
+    return sanitize(os.path.splitext(os.path.basename(uri))[0], "Mesh")
+
+def asset_name(prefix, key):
+    """Stable asset name: readable prefix plus a short content hash, e.g. base_link_3f2a9c1d."""
+    return f"{sanitize(prefix)}_{str(key)[:HASH_LEN]}"
+
+def model_package_path(dest_pkg, model_name):
+    # not truncated: models sharing a long prefix must not share a package
+    return f"{dest_pkg}/{sanitize(model_name, 'Model', max_len=None)}"
+
+def manifest_file_name(model_pkg_path):
+    # readable prefix plus a hash of the full path, so truncation can't merge two models' manifests
+    return f"{asset_name(model_pkg_path, hashlib.sha1(model_pkg_path.encode()).hexdigest())}.json"
+
+def component_name(name):
+    return _INVALID_COMPONENT_CHARS.sub("_", name) or "Component"
+
+class ComponentNames:
+    """Hands out unique component names inside one Blueprint."""
+
+    def __init__(self):
+        self.used = set()
+
+    def unique(self, name):
+        base = component_name(name)
+        candidate, i = base, 1
+        while candidate.lower() in self.used:
+            candidate = f"{base}_{i}"
+            i += 1
+        self.used.add(candidate.lower())
+        return candidate
+
+class Manifest:
+    """Per model package record of which source mesh (and content key) produced which asset."""
+
+    def __init__(self, path, package=""):
+        self.path = path
+        self.package = package
+        self.meshes = {}   # source uri -> {"key": ..., "asset": ..., "fingerprint": ...}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path, package=""):
+        manifest = cls(path, package)
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                manifest.meshes = data.get("meshes", {})
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable manifest {path}: {e}")
+        return manifest
+
+    def lookup(self, uri, key):
+        entry = self.meshes.get(uri)
+        if entry and key is not None and entry.get("key") == str(key):
+            return entry.get("asset")
+        return None
+
+    def lookup_fingerprint(self, uri, fingerprint):
+        # cheap check by file stats, for previews that shouldn't hash the source
+        entry = self.meshes.get(uri)
+        if entry and fingerprint is not None and entry.get("fingerprint") == fingerprint:
+            return entry.get("asset")
+        return None
+
+    def record(self, uri, key, asset_path, fingerprint=None):
+        entry = {"key": str(key), "asset": asset_path}
+        if fingerprint is not None: entry["fingerprint"] = fingerprint
+        if self.meshes.get(uri) != entry:
+            self.meshes[uri] = entry
+            self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump({"package": self.package, "meshes": self.meshes}, f, indent=2, sort_keys=True)
+        self.dirty = False
@@ -2,30 +2,12 @@ import xml.etree.ElementTree as ET
 import os
 from . import schema
 from . import utils
+from . import fileio
+from . import analysis
+from . import naming
 
 def report(model: schema.Model):
-    msg = f"Model: {model.name} readed from SDF\n"
-    msg += f"Number of Links: {len(model.links)}\n"
-    msg += f"Number of Joints: {len(model.joints)}\n"
-    
-    total_mass = 0.0
-    msg += "\nMass information:\n"
-    for link_name, link in model.links.items():
-        mass = link.inertial.mass
-        total_mass += mass
-        msg += f"  - {link_name}: {mass:.3f} kg\n"
-    msg += f"Total mass: {total_mass:.3f} kg\n"
-    
-    msg += "\nMandatory mesh files for creating process:\n"
-    unique_meshes = set()
-    for link in model.links.values():
-        if link.visuals:
-            for visual in link.visuals:
-                if visual.geometry and visual.geometry.mesh:
-                    unique_meshes.add(visual.geometry.mesh.mesh_name)
-    for mesh_name in sorted(unique_meshes):
-        msg += f"  - {mesh_name}\n"
-    return msg
+    return analysis.render_text(analysis.summarize(model).to_dict())
 
 def parse_geometry(geom_elem):
     """Geometry elementini okuyup schema.Geometry döner."""
@@ -37,7 +19,7 @@ def parse_geometry(geom_elem):
     if mesh_elem is not None:
         uri = mesh_elem.findtext('uri', default="")
         scale = utils.parse_scale_text(mesh_elem.findtext('scale', default="1 1 1"))
-        mesh_name = os.path.basename(uri).replace('.dae', '').replace('.stl', '').replace('.obj', '').replace('.', '_')
+        mesh_name = naming.readable_name(uri)
         return schema.Geometry(mesh=schema.Mesh(mesh_name, uri, scale))
 
     # BOX CHECK
@@ -62,109 +44,147 @@ def parse_geometry(geom_elem):
 
     return None
 
-def parse_sdf(sdf_path):
+def parse_link(l):
+    link_name = l.get('name', 'UnnamedLink')
+    pose = utils.parse_pose_text(l.findtext('pose', default="0 0 0 0 0 0"))
+
+    visuals = []
+    collisions = []
+
+    # Visuals Parsing
+    for v in l.findall('visual'):
+        v_pose = utils.parse_pose_text(v.findtext('pose', default="0 0 0 0 0 0"))
+        transparency = float(v.findtext('transparency', default="0.0"))
+        cast_shadows = v.findtext('cast_shadows', default="1") == "1"
+
+        geometry = parse_geometry(v.find('geometry'))
+
+        visuals.append(schema.Visual(v_pose, geometry, transparency, cast_shadows))
+
+    # Collisions Parsing
+    for c in l.findall('collision'):
+        c_name = c.get('name', 'UnnamedCollision')
+        c_pose = utils.parse_pose_text(c.findtext('pose', default="0 0 0 0 0 0"))
+        geometry = parse_geometry(c.find('geometry'))
+        collisions.append(schema.Collision(c_name, c_pose, geometry))
+
+    # Inertial Parsing
+    inertial = schema.Inertial()
+    inertial_elem = l.find('inertial')
+    if inertial_elem is not None:
+        mass = float(inertial_elem.findtext('mass', default="1.0"))
+        inertial_pose = utils.parse_pose_text(inertial_elem.findtext('pose', default="0 0 0 0 0 0"))
+
+        inertia_elem = inertial_elem.find('inertia')
+        if inertia_elem is not None:
+            ixx = float(inertia_elem.findtext('ixx', default="1.0"))
+            ixy = float(inertia_elem.findtext('ixy', default="0.0"))
+            ixz = float(inertia_elem.findtext('ixz', default="0.0"))
+            iyy = float(inertia_elem.findtext('iyy', default="1.0"))
+            iyz = float(inertia_elem.findtext('iyz', default="0.0"))
+            izz = float(inertia_elem.findtext('izz', default="1.0"))
+            inertia_obj = schema.Inertia(ixx, ixy, ixz, iyy, iyz, izz)
+        else:
+            inertia_obj = schema.Inertia()
+
+        inertial = schema.Inertial(mass, inertial_pose, inertia_obj)
+
+    return schema.Link(link_name, pose, visuals, collisions, inertial)
+
+def parse_joint(j):
+    joint_name = j.get('name', 'UnnamedJoint')
+    parent = j.findtext('parent', default="")
+    child = j.findtext('child', default="")
+    joint_type = j.get('type', 'fixed')
+    pose = utils.parse_pose_text(j.findtext('pose', default="0 0 0 0 0 0"))
+
+    # Axis
+    axis_elem = j.find('axis')
+    axis = (0, 0, 0)
+    limit = schema.Limit()
+    dynamics = schema.Dynamics()
+
+    if axis_elem is not None:
+        axis_text = axis_elem.findtext('xyz', default="0 0 0")
+        vals = [float(v) for v in axis_text.strip().split()]
+        vals += [0.0] * (3 - len(vals))
+        axis = tuple(vals[:3])
+
+        lim_elem = axis_elem.find('limit')
+        if lim_elem is not None:
+            lower = float(lim_elem.findtext('lower', default="0.0"))
+            upper = float(lim_elem.findtext('upper', default="0.0"))
+            effort = lim_elem.findtext('effort')
+            velocity = lim_elem.findtext('velocity')
+            limit = schema.Limit(lower, upper, 
+                                 float(effort) if effort else None, 
+                                 float(velocity) if velocity else None)
+
+        dyn_elem = axis_elem.find('dynamics')
+        if dyn_elem is not None:
+            damping = float(dyn_elem.findtext('damping', default="0.0"))
+            friction = float(dyn_elem.findtext('friction', default="0.0"))
+            dynamics = schema.Dynamics(damping, friction)
+
+    return schema.Joint(joint_name, parent, child, joint_type, axis, pose, limit, dynamics)
+
+def _iter_events(sdf_path, files: fileio.MappedFiles=None):
+    events = ("start", "end")
+    if files is None:
+        yield from ET.iterparse(sdf_path, events=events)
+        return
+    pull = ET.XMLPullParser(events=events)
+    for chunk in files.chunks(sdf_path):
+        pull.feed(chunk)
+        yield from pull.read_events()
+    pull.close()
+    yield from pull.read_events()
+
+def parse_sdf(sdf_path, files: fileio.MappedFiles=None, listener=None):
+    """Streams the SDF, building each link and joint as soon as its element is closed.
+
+    listener (optional) receives add_link(link) / add_joint(joint) calls during the parse.
+    """
     links = {}
     joints = {}
-    model_name = "DefaultModel"
+    model_elem = None
 
     try:
         if not os.path.exists(sdf_path):
             raise FileNotFoundError(f"SDF not found: {sdf_path}")
-        tree = ET.parse(sdf_path)
-        root = tree.getroot()
-        model = root.find('model')
-        if model is None:
+
+        stack = []
+        for event, elem in _iter_events(sdf_path, files):
+            if event == "start":
+                stack.append(elem)
+                # only the first top level <model> is imported
+                if len(stack) == 2 and elem.tag == 'model' and model_elem is None:
+                    model_elem = elem
+                continue
+
+            stack.pop()
+            if len(stack) != 2 or stack[1] is not model_elem:
+                continue
+
+            # --- LINKS ---
+            if elem.tag == 'link':
+                link = parse_link(elem)
+                links[link.name] = link
+                if listener: listener.add_link(link)
+                elem.clear()
+
+            # --- JOINTS ---
+            elif elem.tag == 'joint':
+                joint = parse_joint(elem)
+                joints[joint.name] = joint
+                if listener: listener.add_joint(joint)
+                elem.clear()
+
+        if model_elem is None:
             raise ValueError("No <model> element found in SDF.")
-        model_name = model.get('name', 'UnnamedModel')
+        model_name = model_elem.get('name', 'UnnamedModel')
     except Exception as e:
         print(f"Error reading SDF: {e}")
         return None
 
-    if model is not None:
-        # --- LINKS ---
-        for l in model.findall('link'):
-            link_name = l.get('name', 'UnnamedLink')
-            pose = utils.parse_pose_text(l.findtext('pose', default="0 0 0 0 0 0"))
-            
-            visuals = []
-            collisions = []
-
-            # Visuals Parsing
-            for v in l.findall('visual'):
-                v_pose = utils.parse_pose_text(v.findtext('pose', default="0 0 0 0 0 0"))
-                transparency = float(v.findtext('transparency', default="0.0"))
-                cast_shadows = v.findtext('cast_shadows', default="1") == "1"
-                
-                geometry = parse_geometry(v.find('geometry'))
-                
-                visuals.append(schema.Visual(v_pose, geometry, transparency, cast_shadows))
-
-            # Collisions Parsing
-            for c in l.findall('collision'):
-                c_name = c.get('name', 'UnnamedCollision')
-                c_pose = utils.parse_pose_text(c.findtext('pose', default="0 0 0 0 0 0"))
-                geometry = parse_geometry(c.find('geometry'))
-                collisions.append(schema.Collision(c_name, c_pose, geometry))
-
-            # Inertial Parsing
-            inertial = schema.Inertial()
-            inertial_elem = l.find('inertial')
-            if inertial_elem is not None:
-                mass = float(inertial_elem.findtext('mass', default="1.0"))
-                inertial_pose = utils.parse_pose_text(inertial_elem.findtext('pose', default="0 0 0 0 0 0"))
-                
-                inertia_elem = inertial_elem.find('inertia')
-                if inertia_elem is not None:
-                    ixx = float(inertia_elem.findtext('ixx', default="1.0"))
-                    ixy = float(inertia_elem.findtext('ixy', default="0.0"))
-                    ixz = float(inertia_elem.findtext('ixz', default="0.0"))
-                    iyy = float(inertia_elem.findtext('iyy', default="1.0"))
-                    iyz = float(inertia_elem.findtext('iyz', default="0.0"))
-                    izz = float(inertia_elem.findtext('izz', default="1.0"))
-                    inertia_obj = schema.Inertia(ixx, ixy, ixz, iyy, iyz, izz)
-                else:
-                    inertia_obj = schema.Inertia()
-                
-                inertial = schema.Inertial(mass, inertial_pose, inertia_obj)
-
-            links[link_name] = schema.Link(link_name, pose, visuals, collisions, inertial)
-
-        # --- JOINTS ---
-        for j in model.findall('joint'):
-            joint_name = j.get('name', 'UnnamedJoint')
-            parent = j.findtext('parent', default="")
-            child = j.findtext('child', default="")
-            joint_type = j.get('type', 'fixed')
-            pose = utils.parse_pose_text(j.findtext('pose', default="0 0 0 0 0 0"))
-            
-            # Axis
-            axis_elem = j.find('axis')
-            axis = (0, 0, 0)
-            limit = schema.Limit()
-            dynamics = schema.Dynamics()
-            
-            if axis_elem is not None:
-                axis_text = axis_elem.findtext('xyz', default="0 0 0")
-                vals = [float(v) for v in axis_text.strip().split()]
-                vals += [0.0] * (3 - len(vals))
-                axis = tuple(vals[:3])
-
-                lim_elem = axis_elem.find('limit')
-                if lim_elem is not None:
-                    lower = float(lim_elem.findtext('lower', default="0.0"))
-                    upper = float(lim_elem.findtext('upper', default="0.0"))
-                    effort = lim_elem.findtext('effort')
-                    velocity = lim_elem.findtext('velocity')
-                    limit = schema.Limit(lower, upper, 
-                                         float(effort) if effort else None, 
-                                         float(velocity) if velocity else None)
-
-                dyn_elem = axis_elem.find('dynamics')
-                if dyn_elem is not None:
-                    damping = float(dyn_elem.findtext('damping', default="0.0"))
-                    friction = float(dyn_elem.findtext('friction', default="0.0"))
-                    dynamics = schema.Dynamics(damping, friction)
-
-            joints[joint_name] = schema.Joint(joint_name, parent, child, joint_type, axis, pose, limit, dynamics)
-
-    return schema.Model(model_name, links, joints, sdf_path)
\ No newline at end of file
+    return schema.Model(model_name, links, joints, sdf_path)
@@ -0,0 +1,207 @@
+# sdf_tools/physics.py
+import math
+import numpy as np
+from . import schema
+from . import utils
+
+MASS_SCALE = 1000.0                      # kept from the original setup: Unreal mass override = kg * 1000
+
+# solver iterations: base + per level of chain depth + per doubling of the mass ratio across joints
+POSITION_ITERATIONS_BASE = 8
+POSITION_ITERATIONS_PER_DEPTH = 4
+POSITION_ITERATIONS_PER_RATIO_DOUBLING = 4
+VELOCITY_ITERATIONS_DIVISOR = 4
+MAX_SOLVER_ITERATIONS = 255
+
+# drive gains and force limits all stay in the scale of these hand-tuned defaults; SDF damping is added
+# to the default and effort used as the force limit, both as plain numbers, never unit converted
+DEFAULT_DRIVE_STIFFNESS = 100000.0
+DEFAULT_DRIVE_DAMPING = 100.0
+
+LOCKED, LIMITED, FREE = "locked", "limited", "free"
+
+class BodyPlan:
+    def __init__(self, name, mass_kg, position_iterations, velocity_iterations):
+        self.name = name
+        self.mass_kg = mass_kg                        # value for set_mass_override_in_kg
+        self.position_iterations = position_iterations
+        self.velocity_iterations = velocity_iterations
+
+class ConstraintPlan:
+    def __init__(self, name, location, rotation, swing1=LOCKED, swing2=LOCKED, twist=LOCKED, twist_limit=0.0,
+                 twist_offset=0.0, linear_x=LOCKED, linear_limit=0.0, linear_offset=0.0,
+                 angular_drive=None, linear_drive=None):
+        self.name = name
+        self.location = location          # (x, y, z) in cm, Unreal axes
+        self.rotation = rotation          # (pitch, yaw, roll) in degrees; constraint X is the joint axis
+        self.swing1 = swing1
+        self.swing2 = swing2
+        self.twist = twist
+        self.twist_limit = twist_limit    # degrees, symmetric around twist_offset
+        self.twist_offset = twist_offset  # degrees
+        self.linear_x = linear_x
+        self.linear_limit = linear_limit  # cm, symmetric around linear_offset
+        self.linear_offset = linear_offset  # cm along constraint X; the child frame sits this far behind the location
+        self.angular_drive = angular_drive  # {"orientation": bool, "velocity": bool, "params": (stiffness, damping, force limit)}
+        self.linear_drive = linear_drive
+
+class PhysicsPlan:
+    def __init__(self, bodies, constraints):
+        self.bodies = bodies              # link name -> BodyPlan
+        self.constraints = constraints    # joint name -> ConstraintPlan
+
+def _rotations(poses):
+    # stack of rotation matrices for (N, 6) poses, ZYX order like utils.rpy_to_matrix
+    r, p, y = poses[:, 3], poses[:, 4], poses[:, 5]
+    cr, sr, cp, sp, cy, sy = np.cos(r), np.sin(r), np.cos(p), np.sin(p), np.cos(y), np.sin(y)
+    return np.stack([
+        np.stack([cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr], axis=-1),
+        np.stack([sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr], axis=-1),
+        np.stack([-sp, cp * sr, cp * cr], axis=-1),
+    ], axis=1)
+
+def _rpy(R):
+    # vectorized utils.matrix_to_rpy
+    sy = np.hypot(R[:, 0, 0], R[:, 1, 0])
+    singular = sy < 1e-6
+    roll = np.where(singular, np.arctan2(-R[:, 1, 2], R[:, 1, 1]), np.arctan2(R[:, 2, 1], R[:, 2, 2]))
+    pitch = np.arctan2(-R[:, 2, 0], sy)
+    yaw = np.where(singular, 0.0, np.arctan2(R[:, 1, 0], R[:, 0, 0]))
+    return roll, pitch, yaw
+
+def _x_to_axis(axes):
+    """Rotations taking +X onto each (normalized) axis, Rodrigues formula over the whole stack."""
+    x = np.array([1.0, 0.0, 0.0])
+    v = np.cross(x, axes)
+    c = axes @ x
+    s2 = np.einsum("ni,ni->n", v, v)
+    K = np.zeros((len(axes), 3, 3))
+    K[:, 0, 1], K[:, 0, 2], K[:, 1, 2] = -v[:, 2], v[:, 1], -v[:, 0]
+    K -= K.transpose(0, 2, 1)
+    scale = np.where(s2 > 1e-12, (1.0 - c) / np.where(s2 > 1e-12, s2, 1.0), 0.0)
+    R = np.eye(3) + K + np.einsum("n,nij,njk->nik", scale, K, K)
+    # axis pointing along -X: half turn around Z
+    R[(s2 <= 1e-12) & (c < 0)] = np.diag([-1.0, -1.0, 1.0])
+    return R
+
+def _to_ue_location(p):
+    return (float(p[0]) * utils.SI_TO_UE, -float(p[1]) * utils.SI_TO_UE, float(p[2]) * utils.SI_TO_UE)
+
+def _chain_depths(model: schema.Model):
+    children = {}
+    has_parent = set()
+    for joint in model.joints.values():
+        if joint.parent in model.links and joint.child in model.links:
+            children.setdefault(joint.parent, []).append(joint.child)
+            has_parent.add(joint.child)
+    depth = {}
+    frontier = [name for name in model.links if name not in has_parent] or list(model.links)[:1]
+    level = 0
+    while frontier:
+        nxt = []
+        for name in frontier:
+            if name in depth: continue
+            depth[name] = level
+            nxt += children.get(name, [])
+        frontier, level = nxt, level + 1
+    return {name: depth.get(name, 0) for name in model.links}
+
+def plan_bodies(model: schema.Model):
+    names = list(model.links)
+    if not names:
+        return {}
+    links = [model.links[n] for n in names]
+
+    mass = np.array([l.inertial.mass for l in links], dtype=float)
+
+    # --- SOLVER ITERATIONS ---
+    depths = _chain_depths(model)
+    depth = np.array([depths[n] for n in names], dtype=float)
+    index = {n: i for i, n in enumerate(names)}
+    ratio = np.ones(len(names))
+    for joint in model.joints.values():
+        if joint.parent in index and joint.child in index:
+            a, b = mass[index[joint.parent]], mass[index[joint.child]]
+            r = max(a, b) / max(min(a, b), 1e-9)
+            ratio[index[joint.parent]] = max(ratio[index[joint.parent]], r)
+            ratio[index[joint.child]] = max(ratio[index[joint.child]], r)
+    position = (POSITION_ITERATIONS_BASE + POSITION_ITERATIONS_PER_DEPTH * depth
+                + POSITION_ITERATIONS_PER_RATIO_DOUBLING * np.log2(ratio))
+    position = np.clip(np.ceil(position), POSITION_ITERATIONS_BASE, MAX_SOLVER_ITERATIONS).astype(int)
+    velocity = np.clip(np.ceil(position / VELOCITY_ITERATIONS_DIVISOR), 1, MAX_SOLVER_ITERATIONS).astype(int)
+
+    return {
+        name: BodyPlan(name, float(mass[i] * MASS_SCALE), int(position[i]), int(velocity[i]))
+        for i, name in enumerate(names)
+    }
+
+def _joint_motion(joint: schema.Joint):
+    """Constraint motions, limits and drives for one joint type."""
+    jt = joint.joint_type
+    lower, upper = joint.limit.lower, joint.limit.upper
+    bounded = upper > lower and (upper - lower) < 2 * math.pi
+    # one continuous mapping: an undamped SDF joint gets exactly the default
+    damping = DEFAULT_DRIVE_DAMPING + joint.dynamics.damping + joint.dynamics.friction
+    # SDF writes "unlimited" as effort -1; a force limit of 0 is unlimited in Unreal
+    force = max(joint.limit.effort or 0.0, 0.0)
+    plan = {}
+
+    if jt in ("revolute", "continuous", "revolute2", "gearbox", "screw"):
+        if jt == "revolute" and bounded:
+            plan["twist"] = LIMITED
+            plan["twist_limit"] = math.degrees(upper - lower) / 2.0
+            plan["twist_offset"] = math.degrees(upper + lower) / 2.0
+        else:
+            plan["twist"] = FREE
+        if jt == "revolute2":
+            plan["swing1"] = FREE
+        plan["angular_drive"] = {
+            # continuous joints spin freely, only their velocity is damped
+            "orientation": jt != "continuous",
+            "velocity": True,
+            "params": (DEFAULT_DRIVE_STIFFNESS if jt != "continuous" else 0.0, damping, force),
+        }
+    elif jt == "prismatic":
+        bounded = upper > lower
+        plan["linear_x"] = LIMITED if bounded else FREE
+        if bounded:
+            # limits are symmetric in Unreal, so the child frame is offset to the middle of [lower, upper]
+            plan["linear_limit"] = (upper - lower) / 2.0 * utils.SI_TO_UE
+            plan["linear_offset"] = (upper + lower) / 2.0 * utils.SI_TO_UE
+        plan["linear_drive"] = {"params": (DEFAULT_DRIVE_STIFFNESS, damping, force)}
+    elif jt == "ball":
+        plan.update(swing1=FREE, swing2=FREE, twist=FREE)
+    elif jt == "universal":
+        # rotates about the axis and one perpendicular; axis2 isn't parsed, so (like revolute2) swing1 it is
+        plan.update(twist=FREE, swing1=FREE)
+    # fixed (and anything unknown) stays fully locked
+    return plan
+
+def plan_constraints(model: schema.Model):
+    joints = [j for j in model.joints.values() if j.parent in model.links and j.child in model.links]
+    if not joints:
+        return {}
+
+    child_poses = np.array([model.links[j.child].pose for j in joints], dtype=float)
+    joint_poses = np.array([j.pose for j in joints], dtype=float)
+    axes = np.array([j.axis for j in joints], dtype=float)
+    norms = np.linalg.norm(axes, axis=1)
+    axes = np.where(norms[:, None] > 1e-9, axes / np.where(norms > 1e-9, norms, 1.0)[:, None], [1.0, 0.0, 0.0])
+
+    # joint frame in the model frame (joint poses are relative to the child link), then X onto the axis
+    R_child = _rotations(child_poses)
+    R_joint = np.einsum("nij,njk->nik", R_child, _rotations(joint_poses))
+    location = child_poses[:, :3] + np.einsum("nij,nj->ni", R_child, joint_poses[:, :3])
+    R_frame = np.einsum("nij,njk->nik", R_joint, _x_to_axis(axes))
+    roll, pitch, yaw = _rpy(R_frame)
+
+    constraints = {}
+    for i, joint in enumerate(joints):
+        constraints[joint.name] = ConstraintPlan(joint.name, _to_ue_location(location[i]),
+                                                 utils.sdf_to_unreal(roll[i], pitch[i], yaw[i]),
+                                                 **_joint_motion(joint))
+    return constraints
+
+def plan_physics(model: schema.Model):
+    """Derives body and constraint setup for every link and joint of the model in one pass."""
+    return PhysicsPlan(plan_bodies(model), plan_constraints(model))
@@ -1,10 +1,11 @@
 # sdf_tools/schema.py
 
 class Mesh:
-    def __init__(self, mesh_name, uri, scale=(1.0, 1.0, 1.0)):
-        self.mesh_name = mesh_name
+    def __init__(self, mesh_name, uri, scale=(1.0, 1.0, 1.0), key=None):
+        self.mesh_name = mesh_name  # readable prefix of the asset name
         self.uri = uri
         self.scale = scale
+        self.key = key  # content key override, defaults to the digest of the file at uri
 
 class Box:
     def __init__(self, size=(1.0, 1.0, 1.0)):
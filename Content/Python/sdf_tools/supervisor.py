@@ -0,0 +1,136 @@
+# sdf_tools/supervisor.py
+import os
+import json
+import time
+import signal
+import threading
+import subprocess
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+JOB_TIMEOUT = 600.0              # wall clock seconds per attempt
+JOB_RETRIES = 1                  # extra attempts after a crash
+JOB_MEMORY_LIMIT = 8 * 2**30     # data segment (heap and private writable mappings) per child, bytes
+JOB_CPU_LIMIT = 900              # CPU seconds per child
+
+# deaths caused by the CPU and file size limits would only repeat on a retry
+LIMIT_SIGNALS = {getattr(signal, name) for name in ("SIGXCPU", "SIGXFSZ") if hasattr(signal, name)}
+# a SIGKILL we didn't send comes from the OOM killer or the user: says nothing about the input
+EXTERNAL_KILL = getattr(signal, "SIGKILL", None)
+
+class JobResult:
+    def __init__(self, returncode, log_path, attempts, timed_out=False):
+        self.returncode = returncode
+        self.log_path = log_path
+        self.attempts = attempts
+        self.timed_out = timed_out
+
+    @property
+    def ok(self):
+        return self.returncode == 0 and not self.timed_out
+
+    @property
+    def killed_externally(self):
+        return not self.timed_out and EXTERNAL_KILL is not None and self.returncode == -EXTERNAL_KILL
+
+    @property
+    def crashed(self):
+        return (not self.timed_out and self.returncode is not None and self.returncode < 0
+                and -self.returncode not in LIMIT_SIGNALS and not self.killed_externally)
+
+    def reason(self):
+        if self.timed_out:
+            return f"timed out after {self.attempts} attempt(s)"
+        if self.returncode is not None and self.returncode < 0:
+            try: name = signal.Signals(-self.returncode).name
+            except ValueError: name = f"signal {-self.returncode}"
+            return f"killed by {name} after {self.attempts} attempt(s)"
+        return f"exit code {self.returncode}"
+
+def _limit_child(pid, memory_limit, cpu_limit):
+    # set from the parent with prlimit, preexec_fn isn't safe from worker threads.
+    # RLIMIT_DATA rather than RLIMIT_AS: Blender reserves far more address space (thread arenas,
+    # TBB/GPU pools) than it ever touches
+    if resource is None or not hasattr(resource, "prlimit"):
+        return
+    try:
+        if memory_limit: resource.prlimit(pid, resource.RLIMIT_DATA, (memory_limit, memory_limit))
+        if cpu_limit: resource.prlimit(pid, resource.RLIMIT_CPU, (cpu_limit, cpu_limit))
+    except (OSError, ValueError) as e:
+        print(f"Could not limit converter process {pid}: {e}")
+
+def _kill(proc):
+    try:
+        if hasattr(os, "killpg"): os.killpg(proc.pid, signal.SIGKILL)
+        else: proc.kill()
+    except OSError:
+        pass
+    proc.wait()
+
+def run_supervised(cmd, log_path, timeout=JOB_TIMEOUT, retries=JOB_RETRIES,
+                   memory_limit=JOB_MEMORY_LIMIT, cpu_limit=JOB_CPU_LIMIT):
+    """Runs cmd with its output streamed to log_path, under a timeout and resource limits.
+
+    Crashes (killed by a signal such as SIGSEGV or SIGABRT) are retried up to `retries` times.
+    Timeouts, clean non-zero exits and deaths from one of the LIMIT_SIGNALS are returned straight
+    away since running the same input again under the same limits won't change them; neither is
+    an external SIGKILL retried.
+    """
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    result = None
+    for attempt in range(1, retries + 2):
+        with open(log_path, "a" if attempt > 1 else "w") as log:
+            log.write(f"--- attempt {attempt}: {' '.join(cmd)}\n")
+            log.flush()
+            proc = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                                    start_new_session=True)
+            _limit_child(proc.pid, memory_limit, cpu_limit)
+            start = time.monotonic()
+            try:
+                proc.wait(timeout=timeout)
+                result = JobResult(proc.returncode, log_path, attempt)
+            except subprocess.TimeoutExpired:
+                _kill(proc)
+                result = JobResult(proc.returncode, log_path, attempt, timed_out=True)
+            log.write(f"--- attempt {attempt} finished in {time.monotonic() - start:.1f}s: {result.reason() if not result.ok else 'ok'}\n")
+
+        if not result.crashed:
+            break
+    return result
+
+def tail(log_path, lines=40):
+    try:
+        with open(log_path, errors="replace") as f:
+            return "".join(f.readlines()[-lines:])
+    except OSError:
+        return ""
+
+class Quarantine:
+    """Inputs known to break the converter, keyed by content hash and persisted between sessions."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}   # content key -> {"source": ..., "reason": ..., "log": ...}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable quarantine {path}: {e}")
+
+    def get(self, key):
+        return self.entries.get(str(key))
+
+    def add(self, key, source, reason, log_path=None):
+        with self._lock:
+            self.entries[str(key)] = {"source": source, "reason": reason, "log": log_path}
+            self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
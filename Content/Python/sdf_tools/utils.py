@@ -1,28 +1,30 @@
 # sdf_tools/utils.py
-import subprocess
 import os
 import math
+import json
 import numpy as np
 import unreal as ue 
 from . import schema
+from . import supervisor
 
 SI_TO_UE = 100.0  # m -> cm
 BLENDER_EXE = "/home/veli/Documents/blender-4.5.5-linux-x64/blender" 
 
-def convert_dae_to_fbx(dae_path, output_folder):
-    if not os.path.exists(dae_path):
-        print(f"Error: DAE file not found: {dae_path}")
-        return None
+# mesh formats Unreal can't import directly, converted to FBX by blender_convert.py
+CONVERTED_MESH_FORMATS = (".dae", ".stl", ".obj")
 
-    file_name = os.path.basename(dae_path)
-    base_name = os.path.splitext(file_name)[0]
-    fbx_name = f"{base_name}.fbx"
-    fbx_path = os.path.join(output_folder, fbx_name)
+# --- MESH OPTIMIZATION (applied by Blender before the FBX export) ---
+MESH_OPTIMIZE = True
+MESH_WELD_TOLERANCE = 1e-5     # metres
+MESH_TRIANGLE_BUDGET = None    # e.g. 50000 to decimate heavier meshes
+MESH_QUANTIZE_BITS = None      # e.g. 16 to snap vertices to a 16 bit grid
 
-    # Create output folder if it doesn't exist
-    os.makedirs(output_folder, exist_ok=True)
+def blender_log_path(output_folder, name):
+    return os.path.join(output_folder, "Logs", f"{name}.log")
 
-    script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "blender_convert.py")
+def run_blender_script(script_name, args, log_path):
+    """Runs a helper script in background Blender under supervisor limits, output goes to log_path."""
+    script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), script_name)
 
     # Check if the script file exists
     if not os.path.exists(script_path):
@@ -34,28 +36,104 @@ def convert_dae_to_fbx(dae_path, output_folder):
         "-b",
         "-P", script_path,
         "--",
-        dae_path,
-        fbx_path
+        *args
     ]
+    return supervisor.run_supervised(cmd, log_path)
+
+def mesh_optimize_args(fbx_path):
+    if not MESH_OPTIMIZE:
+        return []
+    args = ["--weld", str(MESH_WELD_TOLERANCE), "--stats", mesh_stats_path(fbx_path)]
+    if MESH_TRIANGLE_BUDGET: args += ["--max-tris", str(int(MESH_TRIANGLE_BUDGET))]
+    if MESH_QUANTIZE_BITS: args += ["--quantize", str(int(MESH_QUANTIZE_BITS))]
+    return args
+
+def mesh_optimize_signature():
+    """The optimization settings that change converter output, folded into the conversion and merge keys."""
+    return json.dumps([MESH_OPTIMIZE, MESH_WELD_TOLERANCE, MESH_TRIANGLE_BUDGET, MESH_QUANTIZE_BITS])
+
+def mesh_stats_path(fbx_path):
+    return os.path.splitext(fbx_path)[0] + ".stats.json"
+
+def read_mesh_stats(fbx_path):
+    try:
+        with open(mesh_stats_path(fbx_path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
-    print(f"Converting DAE to FBX: {file_name}...")
+def _remove_outputs(fbx_path):
+    for path in (fbx_path, mesh_stats_path(fbx_path)):
+        if os.path.exists(path): os.remove(path)
 
-    result = subprocess.run(cmd, text=True, capture_output=True)
+def convert_mesh_to_fbx(mesh_path, output_folder, fbx_name=None):
+    """Converts a mesh to FBX in background Blender.
 
-    if result.returncode != 0:
-        print("--- BLENDER ERROR ---")
-        print(result.stdout) 
-        print(result.stderr)
-        return None
+    Returns (fbx path or None, supervisor.JobResult or None); the job result is None when Blender never ran.
+    """
+    if not os.path.exists(mesh_path):
+        print(f"Error: Mesh file not found: {mesh_path}")
+        return None, None
+
+    file_name = os.path.basename(mesh_path)
+    base_name = fbx_name or os.path.splitext(file_name)[0]
+    fbx_name = f"{base_name}.fbx"
+    fbx_path = os.path.join(output_folder, fbx_name)
+
+    # Create output folder if it doesn't exist
+    os.makedirs(output_folder, exist_ok=True)
+
+    print(f"Converting {file_name} to FBX...")
+
+    # never mistake the leftover of an earlier, killed run (or its stats) for a result
+    _remove_outputs(fbx_path)
+
+    log_path = blender_log_path(output_folder, base_name)
+    result = run_blender_script("blender_convert.py", [mesh_path, fbx_path, *mesh_optimize_args(fbx_path)], log_path)
+    if result is None:
+        return None, None
+
+    if not result.ok:
+        print(f"--- BLENDER ERROR ({result.reason()}), full log: {log_path} ---")
+        print(supervisor.tail(log_path))
+        return None, result
     
     if not os.path.exists(fbx_path):
         print("--- ERROR: Blender finished but FBX file was not created. ---")
-        print("Blender Log:")
-        print(result.stdout)
-        return None
+        print(f"Blender Log: {log_path}")
+        print(supervisor.tail(log_path))
+        return None, result
 
     print("Conversion Done.")
-    return fbx_path
+    return fbx_path, result
+
+def merge_meshes_to_fbx(job, output_folder, fbx_name):
+    """Bakes the parts of a merge job (see merge.visual_merge_job) into one FBX.
+
+    Returns (fbx path or None, supervisor.JobResult or None) like convert_mesh_to_fbx.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    fbx_path = os.path.join(output_folder, f"{fbx_name}.fbx")
+    job_path = os.path.join(output_folder, f"{fbx_name}.json")
+    with open(job_path, "w") as f:
+        json.dump(job, f)
+
+    print(f"Merging {len(job['parts'])} parts into {fbx_name}...")
+
+    _remove_outputs(fbx_path)
+
+    log_path = blender_log_path(output_folder, fbx_name)
+    result = run_blender_script("blender_merge.py", [job_path, fbx_path, *mesh_optimize_args(fbx_path)], log_path)
+    if result is None:
+        return None, None
+
+    if not result.ok or not os.path.exists(fbx_path):
+        print(f"--- BLENDER MERGE ERROR ({result.reason() if not result.ok else 'no FBX written'}), full log: {log_path} ---")
+        print(supervisor.tail(log_path))
+        return None, result
+
+    print("Merge Done.")
+    return fbx_path, result
 
 def parse_pose_text(text):
     if not text or not text.strip():
@@ -97,6 +175,21 @@ def compose_pose(parent_pose, child_pose):
     r, p, y = matrix_to_rpy(R)
     return t[0], t[1], t[2], r, p, y
 
+def pose_to_matrix(pose, scale=(1.0, 1.0, 1.0)):
+    x, y, z, r, p, yaw = pose
+    M = np.eye(4)
+    M[:3, :3] = rpy_to_matrix(r, p, yaw) * np.asarray(scale, dtype=float)
+    M[:3, 3] = (x, y, z)
+    return M
+
+def matrix_to_pose(M):
+    r, p, y = matrix_to_rpy(M[:3, :3])
+    return M[0, 3], M[1, 3], M[2, 3], r, p, y
+
+def relative_pose(parent_pose, child_pose):
+    # child pose expressed in the parent frame (both given in the same frame)
+    return matrix_to_pose(np.linalg.inv(pose_to_matrix(parent_pose)) @ pose_to_matrix(child_pose))
+
 def sdf_to_unreal(r, p, y):
     r_u = math.degrees(r)
     p_u = -math.degrees(p)
@@ -113,8 +206,17 @@ def parse_scale_text(text):
     vals += [1.0] * (3 - len(vals))
     return tuple(vals[:3])
 
-def world_pose_of_joint_childed(model: schema.Model, joint: schema.Joint):
-    child_link = model.links.get(joint.child)
-    if child_link is None:
-        return (0,0,0,0,0,0)
-    return compose_pose(child_link.pose, joint.pose)
\ No newline at end of file
+def resolve_mesh_uri(sdf_path, uri):
+    # if <uri>meshes/shelf_big_movai.dae</uri> -> make it a proper path
+    if uri.startswith("file://"): uri = uri.replace("file://", "")
+    if not os.path.isabs(uri):
+        uri = os.path.join(os.path.dirname(sdf_path), uri)
+    return uri
+
+def mesh_uris(model: schema.Model, links=None):
+    uris = []
+    for link in (model.links.values() if links is None else links):
+        for visual in link.visuals:
+            if visual and visual.geometry and visual.geometry.mesh:
+                uris.append(resolve_mesh_uri(model.sdf_path, visual.geometry.mesh.uri))
+    return list(dict.fromkeys(uris))
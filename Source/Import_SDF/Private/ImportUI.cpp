@@ -76,7 +76,7 @@ void ImportUI::UpdateReportView(const FString& SDFPath)
 
     FString PythonCode = FString::Printf(
         TEXT("import sys\n"
-             "sys.path.append(r'%s')\n"
+             "if r'%s' not in sys.path: sys.path.append(r'%s')\n"
              "import importlib\n"
              "import sdf_tools.core\n"
              "importlib.reload(sdf_tools.core)\n"
@@ -85,6 +85,7 @@ void ImportUI::UpdateReportView(const FString& SDFPath)
              "except Exception as e:\n"
              "    print(f'Python Error: {e}')"),
         *CleanPluginPath,
+        *CleanPluginPath,
         *SDFPath
     );
 
@@ -136,7 +137,7 @@ FReply ImportUI::OnImportClicked()
 
     FString PythonCode = FString::Printf(
         TEXT("import sys\n"
-             "sys.path.append(r'%s')\n"
+             "if r'%s' not in sys.path: sys.path.append(r'%s')\n"
              "import importlib\n"
              "import sdf_tools.core\n"
              "importlib.reload(sdf_tools.core)\n"
@@ -145,6 +146,7 @@ FReply ImportUI::OnImportClicked()
              "except Exception as e:\n"
              "    print(f'Python Error: {e}')"),
         *CleanPluginPath,
+        *CleanPluginPath,
         *SDFPath, 
         *OutPath
     );